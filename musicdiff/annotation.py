@@ -25,6 +25,17 @@ from musicdiff import M21Utils
 from musicdiff import DetailLevel
 
 class AnnNote:
+    # AnnNotes are created for every note in both scores, and their attributes are
+    # read over and over during the diff, so we use __slots__ (faster attribute
+    # access, and less memory per instance).
+    __slots__ = (
+        'general_note', 'is_in_chord', 'note_idx_in_chord', 'gap_dur', 'beamings',
+        'tuplets', 'tuplet_info', 'note_offset', 'note_dur_type', 'note_dur_dots',
+        'note_is_grace', 'fullNameSuffix', 'styledict', 'noteshape', 'noteheadFill',
+        'noteheadParenthesis', 'stemDirection', 'pitches', 'note_head', 'dots',
+        'graceType', 'graceSlash', 'articulations', 'expressions', 'precomputed_str'
+    )
+
     def __init__(
         self,
         general_note: m21.note.GeneralNote,
@@ -1328,6 +1339,11 @@ class AnnPart:
 
 
 class AnnStaffGroup:
+    __slots__ = (
+        'staff_group', 'name', 'abbreviation', 'symbol', 'barTogether',
+        'part_indices', 'n_of_parts', 'precomputed_str'
+    )
+
     def __init__(
         self,
         staff_group: m21.layout.StaffGroup,
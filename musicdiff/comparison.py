@@ -18,7 +18,6 @@ from collections import namedtuple
 from difflib import ndiff
 
 # import typing as t
-import numpy as np
 
 from music21.common import OffsetQL
 from musicdiff.annotation import AnnScore, AnnNote, AnnVoice, AnnExtra, AnnLyric
@@ -137,9 +136,12 @@ class Comparison:
     def _myers_diff(a_lines, b_lines):
         # Myers algorithm for LCS of bars (instead of the recursive algorithm in section 3.2)
         # This marks the farthest-right point along each diagonal in the edit
-        # graph, along with the history that got it there
+        # graph, along with the history that got it there.  A history is a linked
+        # list of (step, previous history) cells, most recent step first, so that
+        # extending one never has to copy it, and never modifies a history that
+        # some other diagonal's path shares.
         Frontier = namedtuple("Frontier", ["x", "history"])
-        frontier = {1: Frontier(0, [])}
+        frontier = {1: Frontier(0, None)}
 
         a_max = len(a_lines)
         b_max = len(b_lines)
@@ -168,17 +170,14 @@ class Comparison:
                     old_x, history = frontier[k - 1]
                     x = old_x + 1
 
-                # We want to avoid modifying the old history, since some other step
-                # may decide to use it.
-                history = history[:]
                 y = x - k
 
                 # We start at the invalid point (0, 0) - we should only start building
                 # up history when we move off of it.
                 if 1 <= y <= b_max and go_down:
-                    history.append((1, b_lines[y - 1][1]))  # add comparetostep
+                    history = ((1, b_lines[y - 1][1]), history)  # add comparetostep
                 elif 1 <= x <= a_max:
-                    history.append((0, a_lines[x - 1][1]))  # add originalstep
+                    history = ((0, a_lines[x - 1][1]), history)  # add originalstep
 
                 # Chew up as many diagonal moves as we can - these correspond to common lines,
                 # and they're considered "free" by the algorithm because we want to maximize
@@ -186,12 +185,17 @@ class Comparison:
                 while x < a_max and y < b_max and a_lines[x][0] == b_lines[y][0]:
                     x += 1
                     y += 1
-                    history.append((2, a_lines[x - 1][1]))  # add equal step
+                    history = ((2, a_lines[x - 1][1]), history)  # add equal step
 
                 if x >= a_max and y >= b_max:
                     # If we're here, then we've traversed through the bottom-left corner,
-                    # and are done.
-                    return np.array(history)
+                    # and are done.  Unlink the history (first step first).
+                    steps = []
+                    while history is not None:
+                        step, history = history
+                        steps.append(step)
+                    steps.reverse()
+                    return steps
 
                 frontier[k] = Frontier(x, history)
 
@@ -199,15 +203,13 @@ class Comparison:
 
     @staticmethod
     def _non_common_subsequences_myers(original, compare_to):
-        # Both original and compare_to are list of lists, or numpy arrays with 2 columns.
+        # Both original and compare_to are lists of 2-element lists.
         # This is necessary because bars need two representation at the same time.
         # One without the id (for comparison), and one with the id (to retrieve the bar
         # at the end).
 
         # get the list of operations
-        op_list = Comparison._myers_diff(
-            np.array(original, dtype=np.int64), np.array(compare_to, dtype=np.int64)
-        )[::-1]
+        op_list = Comparison._myers_diff(original, compare_to)[::-1]
         # retrieve the non common subsequences
         non_common_subsequences = []
         non_common_subsequences.append({"original": [], "compare_to": []})
@@ -235,21 +237,22 @@ class Comparison:
         original_int = [[o.precomputed_str, o.precomputed_repr] for o in original_m]
         compare_to_int = [[c.precomputed_str, c.precomputed_repr] for c in compare_to_m]
         ncs = Comparison._non_common_subsequences_myers(original_int, compare_to_int)
-        # retrieve the original pointers to measures
+        # retrieve the original pointers to measures (via a dict per side, rather than
+        # searching the measure list for each one; setdefault keeps the first measure
+        # with a given precomputed_repr, just as the search did)
+        original_of_repr: dict = {}
+        for m in original_m:
+            original_of_repr.setdefault(m.precomputed_repr, m)
+        compare_to_of_repr: dict = {}
+        for m in compare_to_m:
+            compare_to_of_repr.setdefault(m.precomputed_repr, m)
+
         new_out = []
         for e in ncs:
-            new_out.append({})
-            for k in e.keys():
-                new_out[-1][k] = []
-                for repr_hash in e[k]:
-                    if k == "original":
-                        new_out[-1][k].append(
-                            next(m for m in original_m if m.precomputed_repr == repr_hash)
-                        )
-                    else:
-                        new_out[-1][k].append(
-                            next(m for m in compare_to_m if m.precomputed_repr == repr_hash)
-                        )
+            new_out.append({
+                "original": [original_of_repr[h] for h in e["original"]],
+                "compare_to": [compare_to_of_repr[h] for h in e["compare_to"]],
+            })
 
         return new_out
 
@@ -20,13 +20,72 @@ import typing as t
 from fractions import Fraction
 
 import music21 as m21
-from music21.common import OffsetQL, opFrac
+from music21.common import OffsetQL
 
 from musicdiff.annotation import AnnMeasure, AnnVoice, AnnNote
 from musicdiff.annotation import AnnExtra, AnnLyric, AnnStaffGroup, AnnMetadataItem
 from musicdiff import M21Utils
 
 
+# Matches the location at the start of each text output entry, e.g.
+# "@@ measure 3b, staff 2, beat 1.5 @@" (used to sort the entries).
+_LOC_RE: re.Pattern[str] = re.compile(
+    r"@@ measure (\d+)(\w*), staff (\d+), beat (\d+|\d+[./]\d+|\d+ \d+/\d+) @@"
+)
+
+
+class _ElementIdMap(dict[int | str, m21.base.Music21Object]):
+    """
+    A map from music21 id to music21 object, for the objects in a score.  The score
+    is walked lazily: a lookup only walks as far into score.recurse() as it needs to
+    to find the object (remembering everything it passes along the way), so if the
+    diffs are all near the start of the score, we never walk the rest of it.
+    Lookups match the way score.recurse().getElementById does: string ids are matched
+    case-insensitively, and if more than one object in the score matches, the map
+    contains the first one.  A missing id raises KeyError.
+
+    Note that the score must not be modified while the map is in use.
+    """
+    def __init__(self, score: m21.stream.Score) -> None:
+        super().__init__()
+        self._walker: t.Iterator[m21.base.Music21Object] = iter(score.recurse())
+
+    @staticmethod
+    def _key(elementId: int | str) -> int | str:
+        # music21's IdFilter lower-cases string ids before comparing them
+        if isinstance(elementId, str):
+            return elementId.lower()
+        return elementId
+
+    def __getitem__(self, elementId: int | str) -> m21.base.Music21Object:
+        return super().__getitem__(self._key(elementId))
+
+    def __missing__(self, key: int | str) -> m21.base.Music21Object:
+        # key has already been through _key
+        for el in self._walker:
+            elKey: int | str = self._key(el.id)
+            if elKey not in self:
+                self[elKey] = el
+                if elKey == key:
+                    return el
+        raise KeyError(key)
+
+
+class _LocationCache:
+    """
+    The results of Visualization._location_of (and of the staff number lookups it
+    does), remembered for the duration of one call to get_text_output.  Keys are
+    object ids, so the scores must not be modified while the cache is in use.
+    """
+    __slots__ = ('locations', 'staffNumbers')
+
+    def __init__(self) -> None:
+        # (id(m21obj), id(score)) -> location string
+        self.locations: dict[tuple[int, int], str] = {}
+        # id(part) -> 1-based staff number
+        self.staffNumbers: dict[int, int] = {}
+
+
 class Visualization:
     # These can be set by the client to different colors
     INSERTED_COLOR = "red"
@@ -42,6 +101,181 @@ class Visualization:
     `CHANGED_COLOR` can be set to customize the rendered score markup that `mark_diffs` does.
     """
 
+    # The time signature _location_of assumes when there isn't one in the score.
+    # Constructing a TimeSignature is not cheap (it parses "4/4"), so we only do it once.
+    # It must not be modified (or inserted in a score).
+    _DEFAULT_TIME_SIGNATURE: m21.meter.TimeSignature = m21.meter.TimeSignature()  # 4/4
+
+    # The ops that mark_diffs handles by simply coloring the note (or lyric holder)
+    # in each score and labeling it with a TextExpression.
+    #   op name: (color attribute name, label, Ann* attribute containing the id,
+    #               whether op[4] contains indices of the notes within chords)
+    _MARK_OPS: dict[str, tuple[str, str, str, bool]] = {
+        # notes
+        "headedit": ("CHANGED_COLOR", "changed note head", "general_note", False),
+        "graceedit": ("CHANGED_COLOR", "changed grace note", "general_note", False),
+        "graceslashedit": (
+            "CHANGED_COLOR", "changed grace note slash", "general_note", False
+        ),
+        "editnoteshape": ("CHANGED_COLOR", "changed note shape", "general_note", False),
+        "editspace": ("CHANGED_COLOR", "changed space before", "general_note", False),
+        "insspace": ("CHANGED_COLOR", "inserted space before", "general_note", False),
+        "delspace": ("CHANGED_COLOR", "deleted space before", "general_note", False),
+        "editnoteheadfill": (
+            "CHANGED_COLOR", "changed note head fill", "general_note", False
+        ),
+        "editnoteheadparenthesis": (
+            "CHANGED_COLOR", "changed note head paren", "general_note", False
+        ),
+        "editstemdirection": (
+            "CHANGED_COLOR", "changed stem direction", "general_note", False
+        ),
+        # dots (In music21, the dots are not separately colorable from the note)
+        "dotins": ("CHANGED_COLOR", "inserted dot", "general_note", False),
+        "dotdel": ("CHANGED_COLOR", "deleted dot", "general_note", False),
+        # tuplets
+        "instuplet": ("CHANGED_COLOR", "inserted tuplet", "general_note", False),
+        "deltuplet": ("CHANGED_COLOR", "deleted tuplet", "general_note", False),
+        "edittuplet": ("CHANGED_COLOR", "changed tuplet", "general_note", False),
+        # ties
+        "tieins": ("INSERTED_COLOR", "inserted tie", "general_note", True),
+        "tiedel": ("DELETED_COLOR", "deleted tie", "general_note", True),
+        # expressions
+        "insexpression": ("INSERTED_COLOR", "inserted expression", "general_note", False),
+        "delexpression": ("DELETED_COLOR", "deleted expression", "general_note", False),
+        "editexpression": ("CHANGED_COLOR", "changed expression", "general_note", False),
+        # articulations
+        "insarticulation": (
+            "INSERTED_COLOR", "inserted articulation", "general_note", False
+        ),
+        "delarticulation": (
+            "DELETED_COLOR", "deleted articulation", "general_note", False
+        ),
+        "editarticulation": (
+            "CHANGED_COLOR", "changed articulation", "general_note", False
+        ),
+        # lyrics
+        "lyricins": ("INSERTED_COLOR", "inserted lyric", "lyric_holder", False),
+        "lyricdel": ("DELETED_COLOR", "deleted lyric", "lyric_holder", False),
+        "lyricsub": ("CHANGED_COLOR", "changed lyric", "lyric_holder", False),
+        "lyricedit": ("CHANGED_COLOR", "changed lyric", "lyric_holder", False),
+        "lyricnumedit": ("CHANGED_COLOR", "changed lyric verse num", "lyric_holder", False),
+        "lyricidedit": ("CHANGED_COLOR", "changed lyric verse id", "lyric_holder", False),
+        "lyricoffsetedit": ("CHANGED_COLOR", "changed lyric offset", "lyric_holder", False),
+        "lyricstyleedit": ("CHANGED_COLOR", "changed lyric style", "lyric_holder", False),
+    }
+
+    # The beam ops that mark_diffs handles by coloring the beams of the note in each
+    # score, and labeling the note.
+    #   op name: (color attribute name, label)
+    _MARK_BEAM_OPS: dict[str, tuple[str, str]] = {
+        "insbeam": ("INSERTED_COLOR", "increased flags"),
+        "delbeam": ("DELETED_COLOR", "decreased flags"),
+        "editbeam": ("CHANGED_COLOR", "changed flags"),
+    }
+
+    # The accidental ops that mark_diffs handles by coloring the accidental of the note
+    # in each score, and labeling the note.
+    #   op name: (color attribute name, label)
+    _MARK_ACCIDENTAL_OPS: dict[str, tuple[str, str]] = {
+        "accidentins": ("INSERTED_COLOR", "inserted accidental"),
+        "accidentdel": ("DELETED_COLOR", "deleted accidental"),
+        "accidentedit": ("CHANGED_COLOR", "changed accidental"),
+    }
+
+    # The staff group ops that mark_diffs handles by simply labeling the staff group
+    # in each score (with Visualization.CHANGED_COLOR).
+    #   op name: label
+    _MARK_STAFF_GROUP_OPS: dict[str, str] = {
+        "staffgrpsub": "changed StaffGroup",
+        "staffgrpnameedit": "changed StaffGroup name",
+        "staffgrpabbreviationedit": "changed StaffGroup abbreviation",
+        "staffgrpsymboledit": "changed StaffGroup symbol shape",
+        "staffgrpbartogetheredit": "changed StaffGroup barline type",
+        "staffgrppartindicesedit": "changed StaffGroup parts",
+    }
+
+    # The ops that get_text_output handles by simply reporting the before and after
+    # values of one attribute of a note.
+    #   op name: readable_str name (also used as the attribute tag in the output)
+    _TEXT_NOTE_OPS: dict[str, str] = {
+        "headedit": "head",
+        "graceedit": "grace",
+        "graceslashedit": "graceslash",
+        "insbeam": "flagsbeams",
+        "delbeam": "flagsbeams",
+        "editbeam": "flagsbeams",
+        "editnoteshape": "noteshape",
+        "editspace": "spacebefore",
+        "insspace": "spacebefore",
+        "delspace": "spacebefore",
+        "editnoteheadfill": "notefill",
+        "editnoteheadparenthesis": "noteparen",
+        "editstemdirection": "stemdir",
+        "dotins": "dots",
+        "dotdel": "dots",
+        "instuplet": "tuplet",
+        "deltuplet": "tuplet",
+        "edittuplet": "tuplet",
+        "insexpression": "expression",
+        "delexpression": "expression",
+        "editexpression": "expression",
+        "insarticulation": "artic",
+        "delarticulation": "artic",
+        "editarticulation": "artic",
+    }
+
+    # The ops that get_text_output handles by simply reporting the before and after
+    # values of one attribute of a note (or of one note in a chord).
+    #   op name: readable_str name (also used as the attribute tag in the output)
+    _TEXT_CHORD_NOTE_OPS: dict[str, str] = {
+        "accidentins": "accid",
+        "accidentdel": "accid",
+        "accidentedit": "accid",
+        "tieins": "tie",
+        "tiedel": "tie",
+    }
+
+    # The ops that get_text_output handles by simply reporting the before and after
+    # values of one attribute of a staff group.
+    #   op name: readable_str name (also used as the attribute tag in the output)
+    _TEXT_STAFF_GROUP_OPS: dict[str, str] = {
+        "staffgrpnameedit": "name",
+        "staffgrpabbreviationedit": "abbr",
+        "staffgrpsymboledit": "sym",
+        "staffgrpbartogetheredit": "barline",
+        "staffgrppartindicesedit": "parts",
+    }
+
+    # The ops that get_text_output handles by simply reporting the before and after
+    # values of (one attribute of) an extra.
+    #   op name: (attribute tag in the output, readable_str name)
+    _TEXT_EXTRA_OPS: dict[str, tuple[str, str]] = {
+        "extrasub": ("", ""),
+        "extracontentedit": (":content", "content"),
+        "extradurationedit": (":dur", "duration"),
+    }
+
+    # The ops that get_text_output handles by simply reporting the before and after
+    # values of (one attribute of) a lyric.
+    #   op name: (attribute tag in the output, readable_str name)
+    _TEXT_LYRIC_OPS: dict[str, tuple[str, str]] = {
+        "lyricsub": ("", ""),
+        "lyricedit": (":rawtext", "rawtext"),
+        "lyricnumedit": (":number", "number"),
+        "lyricidedit": (":id", "id"),
+        "lyricstyleedit": (":style", "style"),
+    }
+
+    # The ops that get_text_output handles by simply reporting the before and after
+    # values of (one attribute of) a metadata item.
+    #   op name: attribute tag in the output
+    _TEXT_METADATA_OPS: dict[str, str] = {
+        "mditemsub": "",
+        "mditemkeyedit": ":key",
+        "mditemvalueedit": ":value",
+    }
+
     @staticmethod
     def mark_diffs(
         score1: m21.stream.Score,
@@ -58,19 +292,59 @@ class Visualization:
             operations (list[tuple]): The operations list that describes the difference
                 between the two scores
         """
+        # Performance note: this is all Python object graph manipulation (finding
+        # music21 objects and inserting TextExpressions into music21 Streams), so there
+        # is nothing here for a JIT (numba) or Cython to speed up.  If this gets slow,
+        # look at how we find the music21 objects (score.recurse() per op is expensive),
+        # how we dispatch on op[0], and how many Stream insertions we do.
         changedStr: str
+
+        # look up the music21 objects by id in these maps, instead of searching
+        # the whole score (score.recurse().getElementById) for each op.
+        id_map1: _ElementIdMap = _ElementIdMap(score1)
+        id_map2: _ElementIdMap = _ElementIdMap(score2)
+
+        # labels for notes and staff groups are gathered here (keyed by target and
+        # color), so that each target ends up with one TextExpression, no matter
+        # how many ops describe it.
+        annotations: dict[
+            tuple[int, str],
+            tuple[m21.stream.Stream, OffsetQL, list[str]]
+        ] = {}
+
         for op in operations:
+            # ops are (opName, ann1, ann2, cost[, indices]) tuples; fetch the name once,
+            # instead of indexing the tuple again for every opName test below.
+            opName: str = op[0]
+
+            # most ops just color the note (or lyric holder) in each score, and label it.
+            markOp: tuple[str, str, str, bool] | None = Visualization._MARK_OPS.get(opName)
+            if markOp is not None:
+                colorName, label, attrName, chordIndexed = markOp
+                color: str = getattr(Visualization, colorName)
+                if op[1] is not None:
+                    Visualization._apply_mark(
+                        annotations, id_map1, getattr(op[1], attrName), color, label,
+                        noteIdx=op[4][0] if chordIndexed else None
+                    )
+                if op[2] is not None:
+                    Visualization._apply_mark(
+                        annotations, id_map2, getattr(op[2], attrName), color, label,
+                        noteIdx=op[4][1] if chordIndexed else None
+                    )
+                continue
+
             # bar
-            if op[0] == "insbar":
+            if opName == "insbar":
                 assert isinstance(op[2], AnnMeasure)
                 # color all the notes in the inserted score2 measure
                 # using Visualization.INSERTED_COLOR
-                measure2 = score2.recurse().getElementById(op[2].measure)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert measure2 is not None
-                textExp = m21.expressions.TextExpression("inserted measure")
-                textExp.style.color = Visualization.INSERTED_COLOR
-                measure2.insert(0, textExp)
+                measure2 = id_map2[op[2].measure]  # type: ignore
+                assert isinstance(measure2, m21.stream.Measure)
+                Visualization._add_label(
+                    annotations, measure2, measure2, 0,
+                    color=Visualization.INSERTED_COLOR, label="inserted measure"
+                )
                 measure2.style.color = (
                     Visualization.INSERTED_COLOR
                 )  # this apparently does nothing
@@ -78,16 +352,16 @@ class Visualization:
                     el.style.color = Visualization.INSERTED_COLOR
                 continue
 
-            if op[0] == "delbar":
+            if opName == "delbar":
                 assert isinstance(op[1], AnnMeasure)
                 # color all the notes in the deleted score1 measure
                 # using Visualization.DELETED_COLOR
-                measure1 = score1.recurse().getElementById(op[1].measure)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert measure1 is not None
-                textExp = m21.expressions.TextExpression("deleted measure")
-                textExp.style.color = Visualization.DELETED_COLOR
-                measure1.insert(0, textExp)
+                measure1 = id_map1[op[1].measure]  # type: ignore
+                assert isinstance(measure1, m21.stream.Measure)
+                Visualization._add_label(
+                    annotations, measure1, measure1, 0,
+                    color=Visualization.DELETED_COLOR, label="deleted measure"
+                )
                 measure1.style.color = (
                     Visualization.DELETED_COLOR
                 )  # this apparently does nothing
@@ -96,16 +370,16 @@ class Visualization:
                 continue
 
             # voices
-            if op[0] == "voiceins":
+            if opName == "voiceins":
                 assert isinstance(op[2], AnnVoice)
                 # color all the notes in the inserted score2 voice
                 # using Visualization.INSERTED_COLOR
-                voice2 = score2.recurse().getElementById(op[2].voice)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert voice2 is not None
-                textExp = m21.expressions.TextExpression("inserted voice")
-                textExp.style.color = Visualization.INSERTED_COLOR
-                voice2.insert(0, textExp)
+                voice2 = id_map2[op[2].voice]  # type: ignore
+                assert isinstance(voice2, m21.stream.Stream)  # a Voice, or a Measure with no Voices
+                Visualization._add_label(
+                    annotations, voice2, voice2, 0,
+                    color=Visualization.INSERTED_COLOR, label="inserted voice"
+                )
 
                 voice2.style.color = (
                     Visualization.INSERTED_COLOR
@@ -114,16 +388,16 @@ class Visualization:
                     el.style.color = Visualization.INSERTED_COLOR
                 continue
 
-            if op[0] == "voicedel":
+            if opName == "voicedel":
                 assert isinstance(op[1], AnnVoice)
                 # color all the notes in the deleted score1 voice
                 # using Visualization.DELETED_COLOR
-                voice1 = score1.recurse().getElementById(op[1].voice)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert voice1 is not None
-                textExp = m21.expressions.TextExpression("deleted voice")
-                textExp.style.color = Visualization.DELETED_COLOR
-                voice1.insert(0, textExp)
+                voice1 = id_map1[op[1].voice]  # type: ignore
+                assert isinstance(voice1, m21.stream.Stream)  # a Voice, or a Measure with no Voices
+                Visualization._add_label(
+                    annotations, voice1, voice1, 0,
+                    color=Visualization.DELETED_COLOR, label="deleted voice"
+                )
 
                 voice1.style.color = (
                     Visualization.DELETED_COLOR
@@ -133,1460 +407,561 @@ class Visualization:
                 continue
 
             # extra
-            if op[0] == "extrains":
+            if opName == "extrains":
                 assert isinstance(op[2], AnnExtra)
-                # color the extra using Visualization.INSERTED_COLOR,
-                # and add a textExpression describing the insertion.
-                extra2 = score2.recurse().getElementById(op[2].extra)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert extra2 is not None
-                textExp = m21.expressions.TextExpression(f"inserted {extra2.classes[0]}")
-                textExp.style.color = Visualization.INSERTED_COLOR
-                if isinstance(extra2, m21.spanner.Spanner):
-                    insertionPoint = extra2.getFirst()
-                    if isinstance(insertionPoint, m21.stream.Measure):
-                        # insertionPoint is a measure, put the textExp at offset 0
-                        # inside the measure
-                        insertionPoint.insert(0, textExp)
-                    else:
-                        # insertionPoint is something else, put the textExp right next to it.
-                        insertionPoint.activeSite.insert(insertionPoint.offset, textExp)
-                else:
-                    # extra2 is not a spanner, put the textExp right next to it
-                    extra2.activeSite.insert(extra2.offset, textExp)
+                # add a textExpression describing the insertion.
+                extra2 = id_map2[op[2].extra]  # type: ignore
+                Visualization._add_extra_label(
+                    annotations, extra2,
+                    Visualization.INSERTED_COLOR, f"inserted {extra2.classes[0]}"
+                )
                 continue
 
-            if op[0] == "extradel":
+            if opName == "extradel":
                 assert isinstance(op[1], AnnExtra)
-                # color the extra using Visualization.DELETED_COLOR, and add a textExpression
-                # describing the deletion.
-                extra1 = score1.recurse().getElementById(op[1].extra)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert extra1 is not None
-                textExp = m21.expressions.TextExpression(f"deleted {extra1.classes[0]}")
-                textExp.style.color = Visualization.DELETED_COLOR
-                if isinstance(extra1, m21.spanner.Spanner):
-                    insertionPoint = extra1.getFirst()
-                    if isinstance(insertionPoint, m21.stream.Measure):
-                        # insertionPoint is a measure, put the textExp at offset 0
-                        # inside the measure
-                        insertionPoint.insert(0, textExp)
-                    else:
-                        # insertionPoint is something else, put the textExp right next to it.
-                        insertionPoint.activeSite.insert(insertionPoint.offset, textExp)
-                else:
-                    # extra1 is not a spanner, put the textExp right next to it
-                    extra1.activeSite.insert(extra1.offset, textExp)
+                # add a textExpression describing the deletion.
+                extra1 = id_map1[op[1].extra]  # type: ignore
+                Visualization._add_extra_label(
+                    annotations, extra1,
+                    Visualization.DELETED_COLOR, f"deleted {extra1.classes[0]}"
+                )
                 continue
 
-            if op[0] == "extrasub":
+            if opName == "extrasub":
                 assert isinstance(op[1], AnnExtra)
                 assert isinstance(op[2], AnnExtra)
-                # color the extra using Visualization.CHANGED_COLOR, and add a textExpression
-                # describing the change.
-                extra1 = score1.recurse().getElementById(op[1].extra)  # type: ignore
-                extra2 = score2.recurse().getElementById(op[2].extra)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert extra1 is not None
-                    assert extra2 is not None
+                # add a textExpression describing the change.
+                extra1 = id_map1[op[1].extra]  # type: ignore
+                extra2 = id_map2[op[2].extra]  # type: ignore
                 if extra1.classes[0] != extra2.classes[0]:
-                    textExp1 = m21.expressions.TextExpression(
-                        f"changed to {extra2.classes[0]}"
-                    )
-                    textExp2 = m21.expressions.TextExpression(
-                        f"changed from {extra1.classes[0]}"
-                    )
-                else:
-                    textExp1 = m21.expressions.TextExpression(f"changed {extra1.classes[0]}")
-                    textExp2 = m21.expressions.TextExpression(f"changed {extra1.classes[0]}")
-                textExp1.style.color = Visualization.CHANGED_COLOR
-                textExp2.style.color = Visualization.CHANGED_COLOR
-                if isinstance(extra1, m21.spanner.Spanner):
-                    insertionPoint1 = extra1.getFirst()
-                    insertionPoint2 = extra2.getFirst()
-                    if isinstance(insertionPoint1, m21.stream.Measure):
-                        # insertionPoint1 is a measure, put the textExp at offset 0
-                        # inside the measure
-                        insertionPoint1.insert(0, textExp)
-                    else:
-                        # insertionPoint1 is something else, put the textExp right next to it.
-                        insertionPoint1.activeSite.insert(insertionPoint1.offset, textExp)
-                    if isinstance(insertionPoint2, m21.stream.Measure):
-                        # insertionPoint2 is a measure, put the textExp at offset 0
-                        # inside the measure
-                        insertionPoint2.insert(0, textExp)
-                    else:
-                        # insertionPoint2 is something else, put the textExp right next to it.
-                        insertionPoint2.activeSite.insert(insertionPoint2.offset, textExp)
-                else:
-                    # extra is not a spanner, put the textExp right next to it
-                    extra1.activeSite.insert(extra1.offset, textExp1)
-                    extra2.activeSite.insert(extra2.offset, textExp2)
-                continue
-
-            if op[0] == "extracontentedit":
-                assert isinstance(op[1], AnnExtra)
-                assert isinstance(op[2], AnnExtra)
-                # color the extra using Visualization.CHANGED_COLOR, and add a textExpression
-                # describing the change.
-                extra1 = score1.recurse().getElementById(op[1].extra)  # type: ignore
-                extra2 = score2.recurse().getElementById(op[2].extra)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert extra1 is not None
-                    assert extra2 is not None
-                textExp1 = m21.expressions.TextExpression(f"changed {extra1.classes[0]} text")
-                textExp2 = m21.expressions.TextExpression(f"changed {extra1.classes[0]} text")
-                textExp1.style.color = Visualization.CHANGED_COLOR
-                textExp2.style.color = Visualization.CHANGED_COLOR
-                if isinstance(extra1, m21.spanner.Spanner):
-                    insertionPoint1 = extra1.getFirst()
-                    insertionPoint2 = extra2.getFirst()
-                    insertionPoint1.activeSite.insert(insertionPoint1.offset, textExp1)
-                    insertionPoint2.activeSite.insert(insertionPoint2.offset, textExp2)
+                    label1 = f"changed to {extra2.classes[0]}"
+                    label2 = f"changed from {extra1.classes[0]}"
                 else:
-                    extra1.activeSite.insert(extra1.offset, textExp1)
-                    extra2.activeSite.insert(extra2.offset, textExp2)
-                continue
-
-            if op[0] == "extraoffsetedit":
-                assert isinstance(op[1], AnnExtra)
-                assert isinstance(op[2], AnnExtra)
-                # color the extra using Visualization.CHANGED_COLOR, and add a textExpression
-                # describing the change.
-                extra1 = score1.recurse().getElementById(op[1].extra)  # type: ignore
-                extra2 = score2.recurse().getElementById(op[2].extra)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert extra1 is not None
-                    assert extra2 is not None
-                textExp1 = m21.expressions.TextExpression(
-                    f"changed {extra1.classes[0]} offset")
-                textExp2 = m21.expressions.TextExpression(
-                    f"changed {extra1.classes[0]} offset")
-                textExp1.style.color = Visualization.CHANGED_COLOR
-                textExp2.style.color = Visualization.CHANGED_COLOR
-                if isinstance(extra1, m21.spanner.Spanner):
-                    insertionPoint1 = extra1.getFirst()
-                    insertionPoint2 = extra2.getFirst()
-                    insertionPoint1.activeSite.insert(insertionPoint1.offset, textExp1)
-                    insertionPoint2.activeSite.insert(insertionPoint2.offset, textExp2)
-                else:
-                    extra1.activeSite.insert(extra1.offset, textExp1)
-                    extra2.activeSite.insert(extra2.offset, textExp2)
+                    label1 = f"changed {extra1.classes[0]}"
+                    label2 = label1
+                Visualization._add_extra_label(
+                    annotations, extra1, Visualization.CHANGED_COLOR, label1
+                )
+                Visualization._add_extra_label(
+                    annotations, extra2, Visualization.CHANGED_COLOR, label2
+                )
                 continue
 
-            if op[0] == "extradurationedit":
+            if opName in ("extracontentedit", "extraoffsetedit", "extradurationedit"):
                 assert isinstance(op[1], AnnExtra)
                 assert isinstance(op[2], AnnExtra)
-                # color the extra using Visualization.CHANGED_COLOR, and add a textExpression
-                # describing the change.
-                extra1 = score1.recurse().getElementById(op[1].extra)  # type: ignore
-                extra2 = score2.recurse().getElementById(op[2].extra)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert extra1 is not None
-                    assert extra2 is not None
-                textExp1 = m21.expressions.TextExpression(
-                    f"changed {extra1.classes[0]} duration")
-                textExp2 = m21.expressions.TextExpression(
-                    f"changed {extra1.classes[0]} duration")
-                textExp1.style.color = Visualization.CHANGED_COLOR
-                textExp2.style.color = Visualization.CHANGED_COLOR
-                if isinstance(extra1, m21.spanner.Spanner):
-                    insertionPoint1 = extra1.getFirst()
-                    insertionPoint2 = extra2.getFirst()
-                    insertionPoint1.activeSite.insert(insertionPoint1.offset, textExp1)
-                    insertionPoint2.activeSite.insert(insertionPoint2.offset, textExp2)
+                # add a textExpression describing the change.
+                extra1 = id_map1[op[1].extra]  # type: ignore
+                extra2 = id_map2[op[2].extra]  # type: ignore
+                if opName == "extracontentedit":
+                    label1 = f"changed {extra1.classes[0]} text"
+                elif opName == "extraoffsetedit":
+                    label1 = f"changed {extra1.classes[0]} offset"
                 else:
-                    extra1.activeSite.insert(extra1.offset, textExp1)
-                    extra2.activeSite.insert(extra2.offset, textExp2)
+                    label1 = f"changed {extra1.classes[0]} duration"
+                Visualization._add_extra_label(
+                    annotations, extra1, Visualization.CHANGED_COLOR, label1
+                )
+                Visualization._add_extra_label(
+                    annotations, extra2, Visualization.CHANGED_COLOR, label1
+                )
                 continue
 
-            if op[0] == "extrastyleedit":
+            if opName == "extrastyleedit":
                 assert isinstance(op[1], AnnExtra)
                 assert isinstance(op[2], AnnExtra)
-                sd1 = op[1].styledict
-                sd2 = op[2].styledict
-                changedStr = ""
-                for k1, v1 in sd1.items():
-                    if k1 not in sd2 or sd2[k1] != v1:
-                        if changedStr:
-                            changedStr += ","
-                        changedStr += k1
-
-                # one last thing: check for keys in sd2 that aren't in sd1
-                for k2 in sd2:
-                    if k2 not in sd1:
-                        if changedStr:
-                            changedStr += ","
-                        changedStr += k2
-
-                # color the extra using Visualization.CHANGED_COLOR,
-                # and add a textExpression describing the change.
-                extra1 = score1.recurse().getElementById(op[1].extra)  # type: ignore
-                extra2 = score2.recurse().getElementById(op[2].extra)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert extra1 is not None
-                    assert extra2 is not None
-
-                textExp1 = m21.expressions.TextExpression(
-                    f"changed {extra1.classes[0]} {changedStr}")
-                textExp2 = m21.expressions.TextExpression(
-                    f"changed {extra1.classes[0]} {changedStr}")
-                textExp1.style.color = Visualization.CHANGED_COLOR
-                textExp2.style.color = Visualization.CHANGED_COLOR
-                if isinstance(extra1, m21.spanner.Spanner):
-                    insertionPoint1 = extra1.getFirst()
-                    insertionPoint2 = extra2.getFirst()
-                    insertionPoint1.activeSite.insert(insertionPoint1.offset, textExp1)
-                    insertionPoint2.activeSite.insert(insertionPoint2.offset, textExp2)
-                else:
-                    extra1.activeSite.insert(extra1.offset, textExp1)
-                    extra2.activeSite.insert(extra2.offset, textExp2)
-                continue
-
-            # staff groups
-            if op[0] == "staffgrpins":
-                assert isinstance(op[2], AnnStaffGroup)
-                # add a textExpression describing the insertion.
-                staffGroup2 = score2.recurse().getElementById(
-                    op[2].staff_group  # type: ignore
-                )
-                if t.TYPE_CHECKING:
-                    assert staffGroup2 is not None
-                textExp = m21.expressions.TextExpression("inserted StaffGroup")
-                textExp.style.color = Visualization.INSERTED_COLOR
-                # insert text at offset 0 in first measure of first part in group
-                insertionSite = staffGroup2.getFirst()[m21.stream.Measure].first()
-                insertionSite.insert(0, textExp)
-                continue
-
-            if op[0] == "staffgrpdel":
-                assert isinstance(op[1], AnnStaffGroup)
-                # add a textExpression describing the deletion.
-                staffGroup1 = score1.recurse().getElementById(
-                    op[1].staff_group  # type: ignore
-                )
-                if t.TYPE_CHECKING:
-                    assert staffGroup1 is not None
-                textExp = m21.expressions.TextExpression("deleted StaffGroup")
-                textExp.style.color = Visualization.DELETED_COLOR
-                # insert text at offset 0 in first measure of first part in group
-                insertionSite = staffGroup1.getFirst()[m21.stream.Measure].first()
-                insertionSite.insert(0, textExp)
-                continue
-
-            if op[0] == "staffgrpsub":
-                assert isinstance(op[1], AnnStaffGroup)
-                assert isinstance(op[2], AnnStaffGroup)
-                # add a textExpression describing the change.
-                staffGroup1 = score1.recurse().getElementById(
-                    op[1].staff_group  # type: ignore
-                )
-                staffGroup2 = score2.recurse().getElementById(
-                    op[2].staff_group  # type: ignore
-                )
-                if t.TYPE_CHECKING:
-                    assert staffGroup1 is not None
-                    assert staffGroup2 is not None
-                textExp1 = m21.expressions.TextExpression("changed StaffGroup")
-                textExp2 = m21.expressions.TextExpression("changed StaffGroup")
-                textExp1.style.color = Visualization.CHANGED_COLOR
-                textExp2.style.color = Visualization.CHANGED_COLOR
-                # insert text at offset 0 in first measure of first part in group
-                insertionSite = staffGroup1.getFirst()[m21.stream.Measure].first()
-                insertionSite.insert(0, textExp1)
-                insertionSite = staffGroup2.getFirst()[m21.stream.Measure].first()
-                insertionSite.insert(0, textExp2)
-                continue
-
-            if op[0] == "staffgrpnameedit":
-                assert isinstance(op[1], AnnStaffGroup)
-                assert isinstance(op[2], AnnStaffGroup)
-                # add a textExpression describing the change.
-                staffGroup1 = score1.recurse().getElementById(
-                    op[1].staff_group  # type: ignore
-                )
-                staffGroup2 = score2.recurse().getElementById(
-                    op[2].staff_group  # type: ignore
-                )
-                if t.TYPE_CHECKING:
-                    assert staffGroup1 is not None
-                    assert staffGroup2 is not None
-                textExp1 = m21.expressions.TextExpression("changed StaffGroup name")
-                textExp2 = m21.expressions.TextExpression("changed StaffGroup name")
-                textExp1.style.color = Visualization.CHANGED_COLOR
-                textExp2.style.color = Visualization.CHANGED_COLOR
-                # insert text at offset 0 in first measure of first part in group
-                insertionSite = staffGroup1.getFirst()[m21.stream.Measure].first()
-                insertionSite.insert(0, textExp1)
-                insertionSite = staffGroup2.getFirst()[m21.stream.Measure].first()
-                insertionSite.insert(0, textExp2)
-                continue
+                changedStr = Visualization._changed_style_keys(
+                    op[1].styledict, op[2].styledict
+                )
 
-            if op[0] == "staffgrpabbreviationedit":
-                assert isinstance(op[1], AnnStaffGroup)
-                assert isinstance(op[2], AnnStaffGroup)
                 # add a textExpression describing the change.
-                staffGroup1 = score1.recurse().getElementById(
-                    op[1].staff_group  # type: ignore
-                )
-                staffGroup2 = score2.recurse().getElementById(
-                    op[2].staff_group  # type: ignore
-                )
-                if t.TYPE_CHECKING:
-                    assert staffGroup1 is not None
-                    assert staffGroup2 is not None
-                textExp1 = m21.expressions.TextExpression("changed StaffGroup abbreviation")
-                textExp2 = m21.expressions.TextExpression("changed StaffGroup abbreviation")
-                textExp1.style.color = Visualization.CHANGED_COLOR
-                textExp2.style.color = Visualization.CHANGED_COLOR
-                # insert text at offset 0 in first measure of first part in group
-                insertionSite = staffGroup1.getFirst()[m21.stream.Measure].first()
-                insertionSite.insert(0, textExp1)
-                insertionSite = staffGroup2.getFirst()[m21.stream.Measure].first()
-                insertionSite.insert(0, textExp2)
+                extra1 = id_map1[op[1].extra]  # type: ignore
+                extra2 = id_map2[op[2].extra]  # type: ignore
+                label1 = f"changed {extra1.classes[0]} {changedStr}"
+                Visualization._add_extra_label(
+                    annotations, extra1, Visualization.CHANGED_COLOR, label1
+                )
+                Visualization._add_extra_label(
+                    annotations, extra2, Visualization.CHANGED_COLOR, label1
+                )
                 continue
 
-            if op[0] == "staffgrpsymboledit":
+            # staff groups
+            staffGroupLabel: str | None = Visualization._MARK_STAFF_GROUP_OPS.get(opName)
+            if staffGroupLabel is not None:
                 assert isinstance(op[1], AnnStaffGroup)
                 assert isinstance(op[2], AnnStaffGroup)
                 # add a textExpression describing the change.
-                staffGroup1 = score1.recurse().getElementById(
-                    op[1].staff_group  # type: ignore
-                )
-                staffGroup2 = score2.recurse().getElementById(
-                    op[2].staff_group  # type: ignore
-                )
-                if t.TYPE_CHECKING:
-                    assert staffGroup1 is not None
-                    assert staffGroup2 is not None
-                textExp1 = m21.expressions.TextExpression("changed StaffGroup symbol shape")
-                textExp2 = m21.expressions.TextExpression("changed StaffGroup symbol shape")
-                textExp1.style.color = Visualization.CHANGED_COLOR
-                textExp2.style.color = Visualization.CHANGED_COLOR
-                # insert text at offset 0 in first measure of first part in group
-                insertionSite = staffGroup1.getFirst()[m21.stream.Measure].first()
-                insertionSite.insert(0, textExp1)
-                insertionSite = staffGroup2.getFirst()[m21.stream.Measure].first()
-                insertionSite.insert(0, textExp2)
+                staffGroup1 = id_map1[op[1].staff_group]  # type: ignore
+                assert isinstance(staffGroup1, m21.layout.StaffGroup)
+                staffGroup2 = id_map2[op[2].staff_group]  # type: ignore
+                assert isinstance(staffGroup2, m21.layout.StaffGroup)
+                # insert text at offset 0 in first measure of first part in group (if the
+                # group has no measures, there is nowhere to put it)
+                insertionSite = Visualization._first_measure_of(staffGroup1)
+                if insertionSite is not None:
+                    Visualization._add_label(
+                        annotations, staffGroup1, insertionSite, 0,
+                        color=Visualization.CHANGED_COLOR, label=staffGroupLabel
+                    )
+                insertionSite = Visualization._first_measure_of(staffGroup2)
+                if insertionSite is not None:
+                    Visualization._add_label(
+                        annotations, staffGroup2, insertionSite, 0,
+                        color=Visualization.CHANGED_COLOR, label=staffGroupLabel
+                    )
                 continue
 
-            if op[0] == "staffgrpbartogetheredit":
-                assert isinstance(op[1], AnnStaffGroup)
+            if opName == "staffgrpins":
                 assert isinstance(op[2], AnnStaffGroup)
-                # add a textExpression describing the change.
-                staffGroup1 = score1.recurse().getElementById(
-                    op[1].staff_group  # type: ignore
-                )
-                staffGroup2 = score2.recurse().getElementById(
-                    op[2].staff_group  # type: ignore
-                )
-                if t.TYPE_CHECKING:
-                    assert staffGroup1 is not None
-                    assert staffGroup2 is not None
-                textExp1 = m21.expressions.TextExpression("changed StaffGroup barline type")
-                textExp2 = m21.expressions.TextExpression("changed StaffGroup barline type")
-                textExp1.style.color = Visualization.CHANGED_COLOR
-                textExp2.style.color = Visualization.CHANGED_COLOR
-                # insert text at offset 0 in first measure of first part in group
-                insertionSite = staffGroup1.getFirst()[m21.stream.Measure].first()
-                insertionSite.insert(0, textExp1)
-                insertionSite = staffGroup2.getFirst()[m21.stream.Measure].first()
-                insertionSite.insert(0, textExp2)
+                # add a textExpression describing the insertion.
+                staffGroup2 = id_map2[op[2].staff_group]  # type: ignore
+                assert isinstance(staffGroup2, m21.layout.StaffGroup)
+                # insert text at offset 0 in first measure of first part in group (if the
+                # group has no measures, there is nowhere to put it)
+                insertionSite = Visualization._first_measure_of(staffGroup2)
+                if insertionSite is not None:
+                    Visualization._add_label(
+                        annotations, staffGroup2, insertionSite, 0,
+                        color=Visualization.INSERTED_COLOR, label="inserted StaffGroup"
+                    )
                 continue
 
-            if op[0] == "staffgrppartindicesedit":
+            if opName == "staffgrpdel":
                 assert isinstance(op[1], AnnStaffGroup)
-                assert isinstance(op[2], AnnStaffGroup)
-                # add a textExpression describing the change.
-                staffGroup1 = score1.recurse().getElementById(
-                    op[1].staff_group  # type: ignore
-                )
-                staffGroup2 = score2.recurse().getElementById(
-                    op[2].staff_group  # type: ignore
-                )
-                if t.TYPE_CHECKING:
-                    assert staffGroup1 is not None
-                    assert staffGroup2 is not None
-                textExp1 = m21.expressions.TextExpression("changed StaffGroup parts")
-                textExp2 = m21.expressions.TextExpression("changed StaffGroup parts")
-                textExp1.style.color = Visualization.CHANGED_COLOR
-                textExp2.style.color = Visualization.CHANGED_COLOR
-                # insert text at offset 0 in first measure of first part in group
-                insertionSite = staffGroup1.getFirst()[m21.stream.Measure].first()
-                insertionSite.insert(0, textExp1)
-                insertionSite = staffGroup2.getFirst()[m21.stream.Measure].first()
-                insertionSite.insert(0, textExp2)
+                # add a textExpression describing the deletion.
+                staffGroup1 = id_map1[op[1].staff_group]  # type: ignore
+                assert isinstance(staffGroup1, m21.layout.StaffGroup)
+                # insert text at offset 0 in first measure of first part in group (if the
+                # group has no measures, there is nowhere to put it)
+                insertionSite = Visualization._first_measure_of(staffGroup1)
+                if insertionSite is not None:
+                    Visualization._add_label(
+                        annotations, staffGroup1, insertionSite, 0,
+                        color=Visualization.DELETED_COLOR, label="deleted StaffGroup"
+                    )
                 continue
 
             # note
-            if op[0] == "noteins":
+            if opName == "noteins":
                 assert isinstance(op[2], AnnNote)
                 # color the inserted score2 general note (note, chord, or rest)
                 # using Visualization.INSERTED_COLOR
                 # The note that was inserted may in fact be a note within a chord,
                 # so be careful to use the chord and the note in that case for
                 # the appropriate operations.
-                noteOrChord2 = score2.recurse().getElementById(op[2].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert noteOrChord2 is not None
+                noteOrChord2 = id_map2[op[2].general_note]  # type: ignore
                 if len(op) >= 5 and op[4] is not None:
-                    note2 = noteOrChord2.notes[op[4]]
+                    assert isinstance(noteOrChord2, m21.chord.Chord)
+                    note2 = noteOrChord2._notes[op[4]]
                 else:
                     note2 = noteOrChord2
-                note2.style.color = Visualization.INSERTED_COLOR
-                textExp = m21.expressions.TextExpression(
-                    f"inserted {note2.classes[0]}")
-                textExp.style.color = Visualization.INSERTED_COLOR
-                noteOrChord2.activeSite.insert(noteOrChord2.offset, textExp)
+                Visualization._annotate(
+                    annotations, note2, Visualization.INSERTED_COLOR,
+                    f"inserted {note2.classes[0]}", noteOrChord2
+                )
                 continue
 
-            if op[0] == "notedel":
+            if opName == "notedel":
                 assert isinstance(op[1], AnnNote)
                 # color the deleted score1 general note (note, chord, or rest)
                 # using Visualization.DELETED_COLOR
                 # The note that was deleted may in fact be a note within a chord,
                 # so be careful to use the chord and the note in that case for
                 # the appropriate operations.
-                noteOrChord1 = score1.recurse().getElementById(op[1].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert noteOrChord1 is not None
+                noteOrChord1 = id_map1[op[1].general_note]  # type: ignore
                 if len(op) >= 5 and op[4] is not None:
-                    note1 = noteOrChord1.notes[op[4]]
+                    assert isinstance(noteOrChord1, m21.chord.Chord)
+                    note1 = noteOrChord1._notes[op[4]]
                 else:
                     note1 = noteOrChord1
-                note1.style.color = Visualization.DELETED_COLOR
-                textExp = m21.expressions.TextExpression(f"deleted {note1.classes[0]}")
-                textExp.style.color = Visualization.DELETED_COLOR
-                noteOrChord1.activeSite.insert(noteOrChord1.offset, textExp)
+                Visualization._annotate(
+                    annotations, note1, Visualization.DELETED_COLOR,
+                    f"deleted {note1.classes[0]}", noteOrChord1
+                )
                 continue
 
             # pitch
-            if op[0] == "pitchnameedit":
+            if opName == "pitchnameedit":
                 assert isinstance(op[1], AnnNote)
                 assert isinstance(op[2], AnnNote)
                 assert len(op) == 5  # the indices must be there
                 # color the changed note (in both scores) using Visualization.CHANGED_COLOR
-                chord1 = score1.recurse().getElementById(op[1].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert chord1 is not None
-                note1 = chord1
-                if not op[1].is_in_chord and "Chord" in chord1.classes:
-                    # color just the indexed note in the chord
-                    idx = op[4][0]
-                    note1 = chord1.notes[idx]
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                note1.style.color = Visualization.CHANGED_COLOR
-                textExp = m21.expressions.TextExpression("changed pitch")
-                textExp.style.color = Visualization.CHANGED_COLOR
-                if note1.activeSite is not None:
-                    note1.activeSite.insert(note1.offset, textExp)
-                else:
-                    chord1.activeSite.insert(chord1.offset, textExp)
-
-                chord2 = score2.recurse().getElementById(op[2].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert chord2 is not None
-                note2 = chord2
-                if not op[2].is_in_chord and "Chord" in chord2.classes:
-                    # color just the indexed note in the chord
-                    idx = op[4][1]
-                    note2 = chord2.notes[idx]
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                note2.style.color = Visualization.CHANGED_COLOR
-                textExp = m21.expressions.TextExpression("changed pitch")
-                textExp.style.color = Visualization.CHANGED_COLOR
-                if note2.activeSite is not None:
-                    note2.activeSite.insert(note2.offset, textExp)
-                else:
-                    chord2.activeSite.insert(chord2.offset, textExp)
+                chord1, note1, _ = Visualization._chord_and_note(
+                    id_map1, op[1], op[4][0], True
+                )
+                Visualization._annotate(
+                    annotations, note1, Visualization.CHANGED_COLOR, "changed pitch", chord1
+                )
+
+                chord2, note2, _ = Visualization._chord_and_note(
+                    id_map2, op[2], op[4][1], True
+                )
+                Visualization._annotate(
+                    annotations, note2, Visualization.CHANGED_COLOR, "changed pitch", chord2
+                )
                 continue
 
-            if op[0] == "inspitch":
+            if opName == "inspitch":
                 assert isinstance(op[2], AnnNote)
                 assert len(op) == 5  # the indices must be there
                 # color the inserted note in score2 using Visualization.INSERTED_COLOR
-                chord2 = score2.recurse().getElementById(op[2].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert chord2 is not None
-                note2 = chord2
-                if not op[2].is_in_chord and "Chord" in chord2.classes:
-                    # color just the indexed note in the chord
-                    idx = op[4][1]
-                    note2 = chord2.notes[idx]
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                note2.style.color = Visualization.INSERTED_COLOR
-                if "Rest" in note2.classes:
-                    textExp = m21.expressions.TextExpression("inserted rest")
-                else:
-                    textExp = m21.expressions.TextExpression("inserted note")
-                textExp.style.color = Visualization.INSERTED_COLOR
-                if note2.activeSite is not None:
-                    note2.activeSite.insert(note2.offset, textExp)
+                chord2, note2, _ = Visualization._chord_and_note(
+                    id_map2, op[2], op[4][1], True
+                )
+                if isinstance(note2, m21.note.Rest):
+                    label = "inserted rest"
                 else:
-                    chord2.activeSite.insert(chord2.offset, textExp)
+                    label = "inserted note"
+                Visualization._annotate(
+                    annotations, note2, Visualization.INSERTED_COLOR, label, chord2
+                )
                 continue
 
-            if op[0] == "delpitch":
+            if opName == "delpitch":
                 assert isinstance(op[1], AnnNote)
                 assert len(op) == 5  # the indices must be there
                 # color the deleted note in score1 using Visualization.DELETED_COLOR
-                chord1 = score1.recurse().getElementById(op[1].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert chord1 is not None
-                note1 = chord1
-                if "Chord" in chord1.classes:
-                    # color just the indexed note in the chord
-                    idx = op[4][0]
-                    note1 = chord1.notes[idx]
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                note1.style.color = Visualization.DELETED_COLOR
-                if "Rest" in note1.classes:
-                    textExp = m21.expressions.TextExpression("deleted rest")
-                else:
-                    textExp = m21.expressions.TextExpression("deleted note")
-                textExp.style.color = Visualization.DELETED_COLOR
-                if note1.activeSite is not None:
-                    note1.activeSite.insert(note1.offset, textExp)
+                chord1, note1, _ = Visualization._chord_and_note(
+                    id_map1, op[1], op[4][0], False
+                )
+                if isinstance(note1, m21.note.Rest):
+                    label = "deleted rest"
                 else:
-                    chord1.activeSite.insert(chord1.offset, textExp)
-                continue
-
-            if op[0] == "headedit":
-                assert isinstance(op[1], AnnNote)
-                assert isinstance(op[2], AnnNote)
-                # color the changed note/rest/chord (in both scores)
-                # using Visualization.CHANGED_COLOR
-                note1 = score1.recurse().getElementById(op[1].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                note1.style.color = Visualization.CHANGED_COLOR
-                textExp = m21.expressions.TextExpression("changed note head")
-                textExp.style.color = Visualization.CHANGED_COLOR
-                note1.activeSite.insert(note1.offset, textExp)
-
-                note2 = score2.recurse().getElementById(op[2].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                note2.style.color = Visualization.CHANGED_COLOR
-                textExp = m21.expressions.TextExpression("changed note head")
-                textExp.style.color = Visualization.CHANGED_COLOR
-                note2.activeSite.insert(note2.offset, textExp)
-                continue
-
-            if op[0] == "graceedit":
-                assert isinstance(op[1], AnnNote)
-                assert isinstance(op[2], AnnNote)
-                # color the changed note/rest/chord (in both scores)
-                # using Visualization.CHANGED_COLOR
-                note1 = score1.recurse().getElementById(op[1].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                note1.style.color = Visualization.CHANGED_COLOR
-                textExp = m21.expressions.TextExpression("changed grace note")
-                textExp.style.color = Visualization.CHANGED_COLOR
-                note1.activeSite.insert(note1.offset, textExp)
-
-                note2 = score2.recurse().getElementById(op[2].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                note2.style.color = Visualization.CHANGED_COLOR
-                textExp = m21.expressions.TextExpression("changed grace note")
-                textExp.style.color = Visualization.CHANGED_COLOR
-                note2.activeSite.insert(note2.offset, textExp)
-                continue
-
-            if op[0] == "graceslashedit":
-                assert isinstance(op[1], AnnNote)
-                assert isinstance(op[2], AnnNote)
-                # color the changed note/rest/chord (in both scores)
-                # using Visualization.CHANGED_COLOR
-                note1 = score1.recurse().getElementById(op[1].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                note1.style.color = Visualization.CHANGED_COLOR
-                textExp = m21.expressions.TextExpression("changed grace note slash")
-                textExp.style.color = Visualization.CHANGED_COLOR
-                note1.activeSite.insert(note1.offset, textExp)
-
-                note2 = score2.recurse().getElementById(op[2].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                note2.style.color = Visualization.CHANGED_COLOR
-                textExp = m21.expressions.TextExpression("changed grace note slash")
-                textExp.style.color = Visualization.CHANGED_COLOR
-                note2.activeSite.insert(note2.offset, textExp)
+                    label = "deleted note"
+                Visualization._annotate(
+                    annotations, note1, Visualization.DELETED_COLOR, label, chord1
+                )
                 continue
 
             # beam
-            if op[0] == "insbeam":
-                assert isinstance(op[1], AnnNote)
-                assert isinstance(op[2], AnnNote)
-                # color the modified note in both scores using Visualization.INSERTED_COLOR
-                note1 = score1.recurse().getElementById(op[1].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                note1.style.color = Visualization.INSERTED_COLOR
-                if hasattr(note1, "beams"):
-                    for beam in note1.beams:
-                        beam.style.color = (
-                            Visualization.INSERTED_COLOR
-                        )  # this apparently does nothing
-                textExp = m21.expressions.TextExpression("increased flags")
-                textExp.style.color = Visualization.INSERTED_COLOR
-                note1.activeSite.insert(note1.offset, textExp)
-
-                note2 = score2.recurse().getElementById(op[2].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                note2.style.color = Visualization.INSERTED_COLOR
-                if hasattr(note2, "beams"):
-                    for beam in note2.beams:
-                        beam.style.color = (
-                            Visualization.INSERTED_COLOR
-                        )  # this apparently does nothing
-                textExp = m21.expressions.TextExpression("increased flags")
-                textExp.style.color = Visualization.INSERTED_COLOR
-                note2.activeSite.insert(note2.offset, textExp)
-                continue
-
-            if op[0] == "delbeam":
-                assert isinstance(op[1], AnnNote)
-                assert isinstance(op[2], AnnNote)
-                # color the modified note in both scores using Visualization.DELETED_COLOR
-                note1 = score1.recurse().getElementById(op[1].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                note1.style.color = Visualization.DELETED_COLOR
-                if hasattr(note1, "beams"):
-                    for beam in note1.beams:
-                        beam.style.color = (
-                            Visualization.DELETED_COLOR
-                        )  # this apparently does nothing
-                textExp = m21.expressions.TextExpression("decreased flags")
-                textExp.style.color = Visualization.CHANGED_COLOR
-                note1.activeSite.insert(note1.offset, textExp)
-
-                note2 = score2.recurse().getElementById(op[2].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                note2.style.color = Visualization.DELETED_COLOR
-                if hasattr(note2, "beams"):
-                    for beam in note2.beams:
-                        beam.style.color = (
-                            Visualization.DELETED_COLOR
-                        )  # this apparently does nothing
-                textExp = m21.expressions.TextExpression("decreased flags")
-                textExp.style.color = Visualization.DELETED_COLOR
-                note2.activeSite.insert(note2.offset, textExp)
-                continue
-
-            if op[0] == "editbeam":
+            beamOp: tuple[str, str] | None = Visualization._MARK_BEAM_OPS.get(opName)
+            if beamOp is not None:
                 assert isinstance(op[1], AnnNote)
                 assert isinstance(op[2], AnnNote)
-                # color the changed beam (in both scores) using Visualization.CHANGED_COLOR
-                note1 = score1.recurse().getElementById(op[1].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                note1.style.color = Visualization.CHANGED_COLOR
-                if hasattr(note1, "beams"):
-                    for beam in note1.beams:
-                        beam.style.color = (
-                            Visualization.CHANGED_COLOR
-                        )  # this apparently does nothing
-                textExp = m21.expressions.TextExpression("changed flags")
-                textExp.style.color = Visualization.CHANGED_COLOR
-                note1.activeSite.insert(note1.offset, textExp)
-
-                note2 = score2.recurse().getElementById(op[2].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                note2.style.color = Visualization.CHANGED_COLOR
-                if hasattr(note2, "beams"):
-                    for beam in note2.beams:
-                        beam.style.color = (
-                            Visualization.CHANGED_COLOR
-                        )  # this apparently does nothing
-                textExp = m21.expressions.TextExpression("changed flags")
-                textExp.style.color = Visualization.CHANGED_COLOR
-                note2.activeSite.insert(note2.offset, textExp)
+                # color the beams of the modified note in both scores
+                colorName, label = beamOp
+                color = getattr(Visualization, colorName)
+                Visualization._mark_beams(annotations, id_map1, op[1], color=color, label=label)
+                Visualization._mark_beams(annotations, id_map2, op[2], color=color, label=label)
                 continue
 
-            if op[0] == "editnoteshape":
+            if opName == "editstyle":
                 assert isinstance(op[1], AnnNote)
                 assert isinstance(op[2], AnnNote)
-                note1 = score1.recurse().getElementById(op[1].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                note1.style.color = Visualization.CHANGED_COLOR
-                textExp = m21.expressions.TextExpression("changed note shape")
-                textExp.style.color = Visualization.CHANGED_COLOR
-                note1.activeSite.insert(note1.offset, textExp)
-
-                note2 = score2.recurse().getElementById(op[2].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                note2.style.color = Visualization.CHANGED_COLOR
-                textExp = m21.expressions.TextExpression("changed note shape")
-                textExp.style.color = Visualization.CHANGED_COLOR
-                note2.activeSite.insert(note2.offset, textExp)
-                continue
-
-            if op[0] == "editspace":
-                assert isinstance(op[1], AnnNote)
-                assert isinstance(op[2], AnnNote)
-                note1 = score1.recurse().getElementById(op[1].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                note1.style.color = Visualization.CHANGED_COLOR
-                textExp = m21.expressions.TextExpression("changed space before")
-                textExp.style.color = Visualization.CHANGED_COLOR
-                note1.activeSite.insert(note1.offset, textExp)
-
-                note2 = score2.recurse().getElementById(op[2].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                note2.style.color = Visualization.CHANGED_COLOR
-                textExp = m21.expressions.TextExpression("changed space before")
-                textExp.style.color = Visualization.CHANGED_COLOR
-                note2.activeSite.insert(note2.offset, textExp)
-                continue
-
-            if op[0] == "insspace":
-                assert isinstance(op[1], AnnNote)
-                assert isinstance(op[2], AnnNote)
-                note1 = score1.recurse().getElementById(op[1].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                note1.style.color = Visualization.CHANGED_COLOR
-                textExp = m21.expressions.TextExpression("inserted space before")
-                textExp.style.color = Visualization.CHANGED_COLOR
-                note1.activeSite.insert(note1.offset, textExp)
-
-                note2 = score2.recurse().getElementById(op[2].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                note2.style.color = Visualization.CHANGED_COLOR
-                textExp = m21.expressions.TextExpression("inserted space before")
-                textExp.style.color = Visualization.CHANGED_COLOR
-                note2.activeSite.insert(note2.offset, textExp)
-                continue
-
-            if op[0] == "delspace":
-                assert isinstance(op[1], AnnNote)
-                assert isinstance(op[2], AnnNote)
-                note1 = score1.recurse().getElementById(op[1].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                note1.style.color = Visualization.CHANGED_COLOR
-                textExp = m21.expressions.TextExpression("deleted space before")
-                textExp.style.color = Visualization.CHANGED_COLOR
-                note1.activeSite.insert(note1.offset, textExp)
-
-                note2 = score2.recurse().getElementById(op[2].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                note2.style.color = Visualization.CHANGED_COLOR
-                textExp = m21.expressions.TextExpression("deleted space before")
-                textExp.style.color = Visualization.CHANGED_COLOR
-                note2.activeSite.insert(note2.offset, textExp)
-                continue
-
-            if op[0] == "editnoteheadfill":
-                assert isinstance(op[1], AnnNote)
-                assert isinstance(op[2], AnnNote)
-                note1 = score1.recurse().getElementById(op[1].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                note1.style.color = Visualization.CHANGED_COLOR
-                textExp = m21.expressions.TextExpression("changed note head fill")
-                textExp.style.color = Visualization.CHANGED_COLOR
-                note1.activeSite.insert(note1.offset, textExp)
-
-                note2 = score2.recurse().getElementById(op[2].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                note2.style.color = Visualization.CHANGED_COLOR
-                textExp = m21.expressions.TextExpression("changed note head fill")
-                textExp.style.color = Visualization.CHANGED_COLOR
-                note2.activeSite.insert(note2.offset, textExp)
-                continue
-
-            if op[0] == "editnoteheadparenthesis":
-                assert isinstance(op[1], AnnNote)
-                assert isinstance(op[2], AnnNote)
-                note1 = score1.recurse().getElementById(op[1].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                note1.style.color = Visualization.CHANGED_COLOR
-                textExp = m21.expressions.TextExpression("changed note head paren")
-                textExp.style.color = Visualization.CHANGED_COLOR
-                note1.activeSite.insert(note1.offset, textExp)
-
-                note2 = score2.recurse().getElementById(op[2].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                note2.style.color = Visualization.CHANGED_COLOR
-                textExp = m21.expressions.TextExpression("changed note head paren")
-                textExp.style.color = Visualization.CHANGED_COLOR
-                note2.activeSite.insert(note2.offset, textExp)
-                continue
+                changedStr = Visualization._changed_style_keys(
+                    op[1].styledict, op[2].styledict
+                )
 
-            if op[0] == "editstemdirection":
-                assert isinstance(op[1], AnnNote)
-                assert isinstance(op[2], AnnNote)
-                note1 = score1.recurse().getElementById(op[1].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                note1.style.color = Visualization.CHANGED_COLOR
-                textExp = m21.expressions.TextExpression("changed stem direction")
-                textExp.style.color = Visualization.CHANGED_COLOR
-                note1.activeSite.insert(note1.offset, textExp)
-
-                note2 = score2.recurse().getElementById(op[2].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                note2.style.color = Visualization.CHANGED_COLOR
-                textExp = m21.expressions.TextExpression("changed stem direction")
-                textExp.style.color = Visualization.CHANGED_COLOR
-                note2.activeSite.insert(note2.offset, textExp)
-                continue
+                note1 = id_map1[op[1].general_note]  # type: ignore
+                Visualization._annotate(
+                    annotations, note1, Visualization.CHANGED_COLOR, f"changed note {changedStr}"
+                )
 
-            if op[0] == "editstyle":
-                assert isinstance(op[1], AnnNote)
-                assert isinstance(op[2], AnnNote)
-                sd1 = op[1].styledict
-                sd2 = op[2].styledict
-                changedStr = ""
-                for k1, v1 in sd1.items():
-                    if k1 not in sd2 or sd2[k1] != v1:
-                        if changedStr:
-                            changedStr += ","
-                        changedStr += k1
-
-                # one last thing: check for keys in sd2 that aren't in sd1
-                for k2 in sd2:
-                    if k2 not in sd1:
-                        if changedStr:
-                            changedStr += ","
-                        changedStr += k2
-
-                note1 = score1.recurse().getElementById(op[1].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                note1.style.color = Visualization.CHANGED_COLOR
-                textExp = m21.expressions.TextExpression(f"changed note {changedStr}")
-                textExp.style.color = Visualization.CHANGED_COLOR
-                note1.activeSite.insert(note1.offset, textExp)
-
-                note2 = score2.recurse().getElementById(op[2].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                note2.style.color = Visualization.CHANGED_COLOR
-                textExp = m21.expressions.TextExpression(f"changed note {changedStr}")
-                textExp.style.color = Visualization.CHANGED_COLOR
-                note2.activeSite.insert(note2.offset, textExp)
+                note2 = id_map2[op[2].general_note]  # type: ignore
+                Visualization._annotate(
+                    annotations, note2, Visualization.CHANGED_COLOR, f"changed note {changedStr}"
+                )
                 continue
 
             # accident
-            if op[0] == "accidentins":
+            accidentalOp: tuple[str, str] | None = (
+                Visualization._MARK_ACCIDENTAL_OPS.get(opName)
+            )
+            if accidentalOp is not None:
                 assert isinstance(op[1], AnnNote)
                 assert isinstance(op[2], AnnNote)
                 assert len(op) == 5  # the indices must be there
-                # color the modified note in both scores using Visualization.INSERTED_COLOR
-                chord1 = score1.recurse().getElementById(op[1].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert chord1 is not None
-                note1 = chord1
-                if "Chord" in chord1.classes:
-                    # color only the indexed note's accidental in the chord
-                    idx = op[4][0]
-                    note1 = chord1.notes[idx]
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                if hasattr(note1, 'pitch') and note1.pitch.accidental:
-                    note1.pitch.accidental.style.color = Visualization.INSERTED_COLOR
-                note1.style.color = Visualization.INSERTED_COLOR
-                textExp = m21.expressions.TextExpression("inserted accidental")
-                textExp.style.color = Visualization.INSERTED_COLOR
-                if note1.activeSite is not None:
-                    note1.activeSite.insert(note1.offset, textExp)
-                else:
-                    chord1.activeSite.insert(chord1.offset, textExp)
-
-                chord2 = score2.recurse().getElementById(op[2].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert chord2 is not None
-                note2 = chord2
-                if "Chord" in chord2.classes:
-                    # color only the indexed note's accidental in the chord
-                    idx = op[4][1]
-                    note2 = chord2.notes[idx]
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                if hasattr(note2, 'pitch') and note2.pitch.accidental:
-                    note2.pitch.accidental.style.color = Visualization.INSERTED_COLOR
-                note2.style.color = Visualization.INSERTED_COLOR
-                textExp = m21.expressions.TextExpression("inserted accidental")
-                textExp.style.color = Visualization.INSERTED_COLOR
-                if note2.activeSite is not None:
-                    note2.activeSite.insert(note2.offset, textExp)
-                else:
-                    chord2.activeSite.insert(chord2.offset, textExp)
+                # color the accidental of the modified note in both scores
+                colorName, label = accidentalOp
+                color = getattr(Visualization, colorName)
+                Visualization._mark_accidental(
+                    annotations, id_map1, op[1], op[4][0], color=color, label=label
+                )
+                Visualization._mark_accidental(
+                    annotations, id_map2, op[2], op[4][1], color=color, label=label
+                )
                 continue
 
-            if op[0] == "accidentdel":
-                assert isinstance(op[1], AnnNote)
-                assert isinstance(op[2], AnnNote)
-                assert len(op) == 5  # the indices must be there
-                # color the modified note in both scores using Visualization.DELETED_COLOR
-                chord1 = score1.recurse().getElementById(op[1].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert chord1 is not None
-                note1 = chord1
-                if "Chord" in chord1.classes:
-                    # color only the indexed note's accidental in the chord
-                    idx = op[4][0]
-                    note1 = chord1.notes[idx]
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                if hasattr(note1, 'pitch') and note1.pitch.accidental:
-                    note1.pitch.accidental.style.color = Visualization.DELETED_COLOR
-                note1.style.color = Visualization.DELETED_COLOR
-                textExp = m21.expressions.TextExpression("deleted accidental")
-                textExp.style.color = Visualization.DELETED_COLOR
-                if note1.activeSite is not None:
-                    note1.activeSite.insert(note1.offset, textExp)
-                else:
-                    chord1.activeSite.insert(chord1.offset, textExp)
-
-                chord2 = score2.recurse().getElementById(op[2].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert chord2 is not None
-                note2 = chord2
-                if "Chord" in chord2.classes:
-                    # color only the indexed note's accidental in the chord
-                    idx = op[4][1]
-                    note2 = chord2.notes[idx]
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                if hasattr(note2, 'pitch') and note2.pitch.accidental:
-                    note2.pitch.accidental.style.color = Visualization.DELETED_COLOR
-                note2.style.color = Visualization.DELETED_COLOR
-                textExp = m21.expressions.TextExpression("deleted accidental")
-                textExp.style.color = Visualization.DELETED_COLOR
-                if note2.activeSite is not None:
-                    note2.activeSite.insert(note2.offset, textExp)
-                else:
-                    chord2.activeSite.insert(chord2.offset, textExp)
-                continue
+            print(
+                f"Annotation type {opName} not yet supported for visualization",
+                file=sys.stderr
+            )
 
-            if op[0] == "accidentedit":
-                assert isinstance(op[1], AnnNote)
-                assert isinstance(op[2], AnnNote)
-                assert len(op) == 5  # the indices must be there
-                # color the changed accidental (in both scores)
-                # using Visualization.CHANGED_COLOR
-                chord1 = score1.recurse().getElementById(op[1].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert chord1 is not None
-                note1 = chord1
-                if "Chord" in chord1.classes:
-                    # color just the indexed note in the chord
-                    idx = op[4][0]
-                    note1 = chord1.notes[idx]
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                if hasattr(note1, 'pitch') and note1.pitch.accidental:
-                    note1.pitch.accidental.style.color = Visualization.CHANGED_COLOR
-                note1.style.color = Visualization.CHANGED_COLOR
-                textExp = m21.expressions.TextExpression("changed accidental")
-                textExp.style.color = Visualization.CHANGED_COLOR
-                if note1.activeSite is not None:
-                    note1.activeSite.insert(note1.offset, textExp)
-                else:
-                    chord1.activeSite.insert(chord1.offset, textExp)
-
-                chord2 = score2.recurse().getElementById(op[2].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert chord2 is not None
-                note2 = chord2
-                if "Chord" in chord2.classes:
-                    # color just the indexed note in the chord
-                    idx = op[4][1]
-                    note2 = chord2.notes[idx]
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                if hasattr(note2, 'pitch') and note2.pitch.accidental:
-                    note2.pitch.accidental.style.color = Visualization.CHANGED_COLOR
-                note2.style.color = Visualization.CHANGED_COLOR
-                textExp = m21.expressions.TextExpression("changed accidental")
-                textExp.style.color = Visualization.CHANGED_COLOR
-                if note2.activeSite is not None:
-                    note2.activeSite.insert(note2.offset, textExp)
-                else:
-                    chord2.activeSite.insert(chord2.offset, textExp)
-                continue
+        Visualization._insert_labels(annotations)
 
-            if op[0] == "dotins":
-                assert isinstance(op[1], AnnNote)
-                assert isinstance(op[2], AnnNote)
-                # In music21, the dots are not separately colorable from the note,
-                # so we will just color the modified note here in both scores,
-                # using Visualization.CHANGED_COLOR
-                note1 = score1.recurse().getElementById(op[1].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                note1.style.color = Visualization.CHANGED_COLOR
-                textExp = m21.expressions.TextExpression("inserted dot")
-                textExp.style.color = Visualization.CHANGED_COLOR
-                note1.activeSite.insert(note1.offset, textExp)
-
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                note2 = score2.recurse().getElementById(op[2].general_note)  # type: ignore
-                note2.style.color = Visualization.CHANGED_COLOR
-                textExp = m21.expressions.TextExpression("inserted dot")
-                textExp.style.color = Visualization.CHANGED_COLOR
-                note2.activeSite.insert(note2.offset, textExp)
-                continue
+    @staticmethod
+    def _chord_and_note(
+        id_map: _ElementIdMap,
+        annNote: AnnNote,
+        noteIdx: int,
+        wholeIfInChord: bool
+    ) -> tuple[m21.base.Music21Object, m21.base.Music21Object, int]:
+        """
+        Find a note (or chord, or rest) in a score, and if it is a chord, the indexed
+        note within it.
 
-            if op[0] == "dotdel":
-                assert isinstance(op[1], AnnNote)
-                assert isinstance(op[2], AnnNote)
-                # In music21, the dots are not separately colorable from the note,
-                # so we will just color the modified note here in both scores,
-                # using Visualization.CHANGED_COLOR
-                note1 = score1.recurse().getElementById(op[1].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                note1.style.color = Visualization.CHANGED_COLOR
-                textExp = m21.expressions.TextExpression("deleted dot")
-                textExp.style.color = Visualization.CHANGED_COLOR
-                note1.activeSite.insert(note1.offset, textExp)
-
-                note2 = score2.recurse().getElementById(op[2].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                note2.style.color = Visualization.CHANGED_COLOR
-                textExp = m21.expressions.TextExpression("deleted dot")
-                textExp.style.color = Visualization.CHANGED_COLOR
-                note2.activeSite.insert(note2.offset, textExp)
-                continue
+        Args:
+            id_map (_ElementIdMap): The score's id map.
+            annNote (AnnNote): The annotated note (or chord, or rest).
+            noteIdx (int): The index of the note within the chord.
+            wholeIfInChord (bool): If True, and annNote.is_in_chord, use the whole
+                chord instead of the indexed note.
+
+        Returns:
+            tuple[music21.base.Music21Object, music21.base.Music21Object, int]: The
+                note/chord/rest, the note within it (or the note/chord/rest itself),
+                and noteIdx (or 0, if the note is not within a chord).
+        """
+        noteOrChord: m21.base.Music21Object = id_map[annNote.general_note]
+        if (isinstance(noteOrChord, m21.chord.Chord)
+                and not (wholeIfInChord and annNote.is_in_chord)):
+            # chord.notes makes a new tuple every time, so we index chord._notes directly
+            return noteOrChord, noteOrChord._notes[noteIdx], noteIdx
+        return noteOrChord, noteOrChord, 0
 
-            # tuplets
-            if op[0] == "instuplet":
-                assert isinstance(op[1], AnnNote)
-                assert isinstance(op[2], AnnNote)
-                note1 = score1.recurse().getElementById(op[1].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                note1.style.color = Visualization.CHANGED_COLOR
-                textExp = m21.expressions.TextExpression("inserted tuplet")
-                textExp.style.color = Visualization.CHANGED_COLOR
-                note1.activeSite.insert(note1.offset, textExp)
-
-                note2 = score2.recurse().getElementById(op[2].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                note2.style.color = Visualization.CHANGED_COLOR
-                textExp = m21.expressions.TextExpression("inserted tuplet")
-                textExp.style.color = Visualization.CHANGED_COLOR
-                note2.activeSite.insert(note2.offset, textExp)
-                continue
+    @staticmethod
+    def _apply_mark(
+        annotations: dict,
+        id_map: _ElementIdMap,
+        elementId: int | str,
+        color: str,
+        label: str,
+        *,
+        noteIdx: int | None = None
+    ) -> None:
+        """
+        Find a note (or chord, or rest) in a score, color it, and label it.
 
-            if op[0] == "deltuplet":
-                assert isinstance(op[1], AnnNote)
-                assert isinstance(op[2], AnnNote)
-                note1 = score1.recurse().getElementById(op[1].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                note1.style.color = Visualization.CHANGED_COLOR
-                textExp = m21.expressions.TextExpression("deleted tuplet")
-                textExp.style.color = Visualization.CHANGED_COLOR
-                note1.activeSite.insert(note1.offset, textExp)
-
-                note2 = score2.recurse().getElementById(op[2].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                note2.style.color = Visualization.CHANGED_COLOR
-                textExp = m21.expressions.TextExpression("deleted tuplet")
-                textExp.style.color = Visualization.CHANGED_COLOR
-                note2.activeSite.insert(note2.offset, textExp)
-                continue
+        Args:
+            annotations (dict): The pending annotations (see `_add_label`).
+            id_map (_ElementIdMap): The score's id map.
+            elementId (int | str): The music21 id of the note/chord/rest.
+            color (str): The color to use.
+            label (str): The label describing the difference.
+            noteIdx (int | None): If not None, and the element is a chord, color (and
+                label) only this note within the chord (default is None).
+        """
+        noteOrChord = id_map[elementId]
+        note = noteOrChord
+        if noteIdx is not None and isinstance(noteOrChord, m21.chord.Chord):
+            # color just the indexed note in the chord (chord.notes makes a new tuple
+            # every time, so we index chord._notes directly)
+            note = noteOrChord._notes[noteIdx]
+        Visualization._annotate(annotations, note, color, label, noteOrChord)
 
-            if op[0] == "edittuplet":
-                assert isinstance(op[1], AnnNote)
-                assert isinstance(op[2], AnnNote)
-                note1 = score1.recurse().getElementById(op[1].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                note1.style.color = Visualization.CHANGED_COLOR
-                textExp = m21.expressions.TextExpression("changed tuplet")
-                textExp.style.color = Visualization.CHANGED_COLOR
-                note1.activeSite.insert(note1.offset, textExp)
-
-                note2 = score2.recurse().getElementById(op[2].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                note2.style.color = Visualization.CHANGED_COLOR
-                textExp = m21.expressions.TextExpression("changed tuplet")
-                textExp.style.color = Visualization.CHANGED_COLOR
-                note2.activeSite.insert(note2.offset, textExp)
-                continue
+    @staticmethod
+    def _mark_beams(
+        annotations: dict,
+        id_map: _ElementIdMap,
+        annNote: AnnNote,
+        *,
+        color: str,
+        label: str
+    ) -> None:
+        """
+        Find a note in a score, color its beams, and label it.
 
-            # ties
-            if op[0] == "tieins":
-                assert isinstance(op[1], AnnNote)
-                assert isinstance(op[2], AnnNote)
-                assert len(op) == 5  # the indices must be there
-                # Color the modified note here in both scores,
-                # using Visualization.INSERTED_COLOR
-                chord1 = score1.recurse().getElementById(op[1].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert chord1 is not None
-                note1 = chord1
-                if "Chord" in chord1.classes:
-                    # color just the indexed note in the chord
-                    idx = op[4][0]
-                    note1 = chord1.notes[idx]
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                note1.style.color = Visualization.INSERTED_COLOR
-                textExp = m21.expressions.TextExpression("inserted tie")
-                textExp.style.color = Visualization.INSERTED_COLOR
-                if note1.activeSite is not None:
-                    note1.activeSite.insert(note1.offset, textExp)
-                else:
-                    chord1.activeSite.insert(chord1.offset, textExp)
-
-                chord2 = score2.recurse().getElementById(op[2].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert chord2 is not None
-                note2 = chord2
-                if "Chord" in chord2.classes:
-                    # color just the indexed note in the chord
-                    idx = op[4][1]
-                    note2 = chord2.notes[idx]
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                note2.style.color = Visualization.INSERTED_COLOR
-                textExp = m21.expressions.TextExpression("inserted tie")
-                textExp.style.color = Visualization.INSERTED_COLOR
-                if note2.activeSite is not None:
-                    note2.activeSite.insert(note2.offset, textExp)
-                else:
-                    chord2.activeSite.insert(chord2.offset, textExp)
-                continue
+        Args:
+            annotations (dict): The pending annotations (see `_add_label`).
+            id_map (_ElementIdMap): The score's id map.
+            annNote (AnnNote): The annotated note.
+            color (str): The color to use.
+            label (str): The label describing the difference.
+        """
+        note = id_map[annNote.general_note]  # type: ignore
+        if isinstance(note, m21.note.NotRest):
+            for beam in note.beams:
+                beam.style.color = color  # this apparently does nothing
+        Visualization._annotate(annotations, note, color, label)
 
-            if op[0] == "tiedel":
-                assert isinstance(op[1], AnnNote)
-                assert isinstance(op[2], AnnNote)
-                assert len(op) == 5  # the indices must be there
-                # Color the modified note in both scores, using Visualization.DELETED_COLOR
-                chord1 = score1.recurse().getElementById(op[1].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert chord1 is not None
-                note1 = chord1
-                if "Chord" in chord1.classes:
-                    # color just the indexed note in the chord
-                    idx = op[4][0]
-                    note1 = chord1.notes[idx]
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                note1.style.color = Visualization.DELETED_COLOR
-                textExp = m21.expressions.TextExpression("deleted tie")
-                textExp.style.color = Visualization.DELETED_COLOR
-                if note1.activeSite is not None:
-                    note1.activeSite.insert(note1.offset, textExp)
-                else:
-                    chord1.activeSite.insert(chord1.offset, textExp)
-
-                chord2 = score2.recurse().getElementById(op[2].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert chord2 is not None
-                note2 = chord2
-                if "Chord" in chord2.classes:
-                    # color just the indexed note in the chord
-                    idx = op[4][1]
-                    note2 = chord2.notes[idx]
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                note2.style.color = Visualization.DELETED_COLOR
-                textExp = m21.expressions.TextExpression("deleted tie")
-                textExp.style.color = Visualization.DELETED_COLOR
-                if note2.activeSite is not None:
-                    note2.activeSite.insert(note2.offset, textExp)
-                else:
-                    chord2.activeSite.insert(chord2.offset, textExp)
-                continue
+    @staticmethod
+    def _mark_accidental(
+        annotations: dict,
+        id_map: _ElementIdMap,
+        annNote: AnnNote,
+        noteIdx: int,
+        *,
+        color: str,
+        label: str
+    ) -> None:
+        """
+        Find a note (possibly within a chord) in a score, color its accidental (if it
+        has one), and label it.
 
-            # expressions
-            if op[0] == "insexpression":
-                assert isinstance(op[1], AnnNote)
-                assert isinstance(op[2], AnnNote)
-                # color the note in both scores using Visualization.INSERTED_COLOR
-                note1 = score1.recurse().getElementById(op[1].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                note1.style.color = Visualization.INSERTED_COLOR
-                textExp = m21.expressions.TextExpression("inserted expression")
-                textExp.style.color = Visualization.INSERTED_COLOR
-                note1.activeSite.insert(note1.offset, textExp)
-
-                note2 = score2.recurse().getElementById(op[2].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                note2.style.color = Visualization.INSERTED_COLOR
-                textExp = m21.expressions.TextExpression("inserted expression")
-                textExp.style.color = Visualization.INSERTED_COLOR
-                note2.activeSite.insert(note2.offset, textExp)
-                continue
+        Args:
+            annotations (dict): The pending annotations (see `_add_label`).
+            id_map (_ElementIdMap): The score's id map.
+            annNote (AnnNote): The annotated note (or chord).
+            noteIdx (int): The index of the note within the chord (ignored if not a chord).
+            color (str): The color to use.
+            label (str): The label describing the difference.
+        """
+        chord, note, _ = Visualization._chord_and_note(id_map, annNote, noteIdx, False)
+        accidental = note.pitch.accidental if isinstance(note, m21.note.Note) else None
+        if accidental is not None:
+            accidental.style.color = color
+        Visualization._annotate(annotations, note, color, label, chord)
 
-            if op[0] == "delexpression":
-                assert isinstance(op[1], AnnNote)
-                assert isinstance(op[2], AnnNote)
-                # color the deleted expression in score1 using Visualization.DELETED_COLOR
-                note1 = score1.recurse().getElementById(op[1].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                note1.style.color = Visualization.DELETED_COLOR
-                textExp = m21.expressions.TextExpression("deleted expression")
-                textExp.style.color = Visualization.DELETED_COLOR
-                note1.activeSite.insert(note1.offset, textExp)
-
-                note2 = score2.recurse().getElementById(op[2].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                note2.style.color = Visualization.DELETED_COLOR
-                textExp = m21.expressions.TextExpression("deleted expression")
-                textExp.style.color = Visualization.DELETED_COLOR
-                note2.activeSite.insert(note2.offset, textExp)
-                continue
+    @staticmethod
+    def _annotate(
+        annotations: dict,
+        el: m21.base.Music21Object,
+        color: str,
+        label: str,
+        fallback_parent: m21.base.Music21Object | None = None
+    ) -> None:
+        """
+        Color a music21 object, and add a label (with the same color) to be placed
+        next to it in a TextExpression that describes the difference.
 
-            if op[0] == "editexpression":
-                assert isinstance(op[1], AnnNote)
-                assert isinstance(op[2], AnnNote)
-                # color the changed beam (in both scores) using Visualization.CHANGED_COLOR
-                note1 = score1.recurse().getElementById(op[1].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                note1.style.color = Visualization.CHANGED_COLOR
-                textExp = m21.expressions.TextExpression("changed expression")
-                textExp.style.color = Visualization.CHANGED_COLOR
-                note1.activeSite.insert(note1.offset, textExp)
-
-                note2 = score2.recurse().getElementById(op[2].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                note2.style.color = Visualization.CHANGED_COLOR
-                textExp = m21.expressions.TextExpression("changed expression")
-                textExp.style.color = Visualization.CHANGED_COLOR
-                note2.activeSite.insert(note2.offset, textExp)
-                continue
+        Args:
+            annotations (dict): The pending annotations (see `_add_label`).
+            el (music21.base.Music21Object): The object (usually a GeneralNote) to color.
+            color (str): The color to use for the object and the TextExpression.
+            label (str): The text to put in the TextExpression.
+            fallback_parent (music21.base.Music21Object): If el has no activeSite (e.g. el
+                is a note within a chord), the TextExpression is placed next to this object
+                instead (default is None).
+        """
+        el.style.color = color
+
+        # activeSite and offset are properties that have to look through el's sites,
+        # so we only ask once.
+        site: m21.stream.Stream | None = el.activeSite
+        offset: OffsetQL
+        if site is not None or fallback_parent is None:
+            offset = el.offset
+        else:
+            site = fallback_parent.activeSite
+            offset = fallback_parent.offset
+        if site is None:
+            # nowhere to put the TextExpression (el is still colored, though)
+            return
+        Visualization._add_label(annotations, el, site, offset, color=color, label=label)
 
-            # articulations
-            if op[0] == "insarticulation":
-                assert isinstance(op[1], AnnNote)
-                assert isinstance(op[2], AnnNote)
-                # color the modified note in both scores using Visualization.INSERTED_COLOR
-                note1 = score1.recurse().getElementById(op[1].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                note1.style.color = Visualization.INSERTED_COLOR
-                textExp = m21.expressions.TextExpression("inserted articulation")
-                textExp.style.color = Visualization.INSERTED_COLOR
-                note1.activeSite.insert(note1.offset, textExp)
-
-                note2 = score2.recurse().getElementById(op[2].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                note2.style.color = Visualization.INSERTED_COLOR
-                textExp = m21.expressions.TextExpression("inserted articulation")
-                textExp.style.color = Visualization.INSERTED_COLOR
-                note2.activeSite.insert(note2.offset, textExp)
-                continue
+    @staticmethod
+    def _add_label(
+        annotations: dict,
+        target: m21.base.Music21Object,
+        site: m21.stream.Stream,
+        offset: OffsetQL,
+        *,
+        color: str,
+        label: str
+    ) -> None:
+        """
+        Add a label describing a difference in target to the pending annotations.
+        All the labels for a particular target (and color) end up in a single
+        TextExpression, inserted into site at offset by `_insert_labels`.
 
-            if op[0] == "delarticulation":
-                assert isinstance(op[1], AnnNote)
-                assert isinstance(op[2], AnnNote)
-                # color the modified note in both scores using Visualization.DELETED_COLOR
-                note1 = score1.recurse().getElementById(op[1].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                note1.style.color = Visualization.DELETED_COLOR
-                textExp = m21.expressions.TextExpression("deleted articulation")
-                textExp.style.color = Visualization.DELETED_COLOR
-                note1.activeSite.insert(note1.offset, textExp)
-
-                note2 = score2.recurse().getElementById(op[2].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                note2.style.color = Visualization.DELETED_COLOR
-                textExp = m21.expressions.TextExpression("deleted articulation")
-                textExp.style.color = Visualization.DELETED_COLOR
-                note2.activeSite.insert(note2.offset, textExp)
-                continue
+        Args:
+            annotations (dict): The pending annotations, keyed by (id(target), color).
+            target (music21.base.Music21Object): The object the label describes.
+            site (music21.stream.Stream): The stream the TextExpression will be inserted in.
+            offset (OffsetQL): The offset in site at which the TextExpression will be inserted.
+            color (str): The color of the TextExpression.
+            label (str): The text describing the difference.
+        """
+        key: tuple[int, str] = (id(target), color)
+        pending: tuple[m21.stream.Stream, OffsetQL, list[str]] | None = annotations.get(key)
+        if pending is None:
+            annotations[key] = (site, offset, [label])
+        elif label not in pending[2]:
+            pending[2].append(label)
 
-            if op[0] == "editarticulation":
-                assert isinstance(op[1], AnnNote)
-                assert isinstance(op[2], AnnNote)
-                # color the modified note (in both scores) using Visualization.CHANGED_COLOR
-                note1 = score1.recurse().getElementById(op[1].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                note1.style.color = Visualization.CHANGED_COLOR
-                textExp = m21.expressions.TextExpression("changed articulation")
-                textExp.style.color = Visualization.CHANGED_COLOR
-                note1.activeSite.insert(note1.offset, textExp)
-
-                note2 = score2.recurse().getElementById(op[2].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                note2.style.color = Visualization.CHANGED_COLOR
-                textExp = m21.expressions.TextExpression("changed articulation")
-                textExp.style.color = Visualization.CHANGED_COLOR
-                note2.activeSite.insert(note2.offset, textExp)
-                continue
+    @staticmethod
+    def _add_extra_label(
+        annotations: dict,
+        extra: m21.base.Music21Object,
+        color: str,
+        label: str
+    ) -> None:
+        """
+        Add a label describing a difference in an extra (direction, spanner, etc) to
+        the pending annotations.  The TextExpression goes right next to the extra (or,
+        for a spanner, right next to its first element, or at the start of it if that
+        first element is a measure).
 
-            # lyrics
-            if op[0] == "lyricins":
-                assert isinstance(op[2], AnnLyric)
-                # color the note with the lyric using Visualization.INSERTED_COLOR
-                note2 = score2.recurse().getElementById(op[2].lyric_holder)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                note2.style.color = Visualization.INSERTED_COLOR
-                textExp = m21.expressions.TextExpression("inserted lyric")
-                textExp.style.color = Visualization.INSERTED_COLOR
-                note2.activeSite.insert(note2.offset, textExp)
-                continue
+        Args:
+            annotations (dict): The pending annotations (see `_add_label`).
+            extra (music21.base.Music21Object): The extra the label describes.
+            color (str): The color of the TextExpression.
+            label (str): The text describing the difference.
+        """
+        insertionPoint: m21.base.Music21Object = extra
+        if isinstance(extra, m21.spanner.Spanner):
+            insertionPoint = extra.getFirst()
+            if isinstance(insertionPoint, m21.stream.Measure):
+                # put the textExp at offset 0 inside the measure
+                Visualization._add_label(
+                    annotations, extra, insertionPoint, 0, color=color, label=label
+                )
+                return
 
-            if op[0] == "lyricdel":
-                assert isinstance(op[1], AnnLyric)
-                # color the note with the lyric using Visualization.DELETED_COLOR
-                note1 = score1.recurse().getElementById(op[1].lyric_holder)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                note1.style.color = Visualization.DELETED_COLOR
-                textExp = m21.expressions.TextExpression("deleted lyric")
-                textExp.style.color = Visualization.DELETED_COLOR
-                note1.activeSite.insert(note1.offset, textExp)
-                continue
+        # put the textExp right next to the insertionPoint
+        Visualization._add_label(
+            annotations, extra, insertionPoint.activeSite, insertionPoint.offset,
+            color=color, label=label
+        )
 
-            if op[0] in ("lyricsub", "lyricedit"):
-                assert isinstance(op[1], AnnLyric)
-                assert isinstance(op[2], AnnLyric)
-                # color the note with changed lyric (in both scores) using
-                # Visualization.CHANGED_COLOR
-                note1 = score1.recurse().getElementById(op[1].lyric_holder)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                note1.style.color = Visualization.CHANGED_COLOR
-                textExp = m21.expressions.TextExpression("changed lyric")
-                textExp.style.color = Visualization.CHANGED_COLOR
-                note1.activeSite.insert(note1.offset, textExp)
-
-                note2 = score2.recurse().getElementById(op[2].lyric_holder)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                note2.style.color = Visualization.CHANGED_COLOR
-                textExp = m21.expressions.TextExpression("changed lyric")
-                textExp.style.color = Visualization.CHANGED_COLOR
-                note2.activeSite.insert(note2.offset, textExp)
-                continue
+    @staticmethod
+    def _insert_labels(annotations: dict) -> None:
+        """
+        Insert one TextExpression for each target in the pending annotations, containing
+        all the labels for that target (separated by "; ").
 
-            if op[0] == "lyricnumedit":
-                assert isinstance(op[1], AnnLyric)
-                assert isinstance(op[2], AnnLyric)
-                # color the modified note (in both scores) using Visualization.CHANGED_COLOR
-                note1 = score1.recurse().getElementById(op[1].lyric_holder)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                note1.style.color = Visualization.CHANGED_COLOR
-                textExp = m21.expressions.TextExpression("changed lyric verse num")
-                textExp.style.color = Visualization.CHANGED_COLOR
-                note1.activeSite.insert(note1.offset, textExp)
-
-                note2 = score2.recurse().getElementById(op[2].lyric_holder)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                note2.style.color = Visualization.CHANGED_COLOR
-                textExp = m21.expressions.TextExpression("changed lyric verse num")
-                textExp.style.color = Visualization.CHANGED_COLOR
-                note2.activeSite.insert(note2.offset, textExp)
-                continue
+        Args:
+            annotations (dict): The pending annotations (see `_add_label`).
+        """
+        # Stream.insert does a bunch of bookkeeping every time it is called.  We use
+        # coreInsert instead, and then do that bookkeeping once for each Stream
+        # we touched.
+        touchedSites: dict[int, m21.stream.Stream] = {}
+        for (_targetId, color), (site, offset, labels) in annotations.items():
+            textExp = m21.expressions.TextExpression("; ".join(labels))
+            textExp.style.color = color
+            site.coreInsert(offset, textExp)
+            touchedSites[id(site)] = site
+        for site in touchedSites.values():
+            site.coreElementsChanged()
+        annotations.clear()
 
-            if op[0] == "lyricidedit":
-                assert isinstance(op[1], AnnLyric)
-                assert isinstance(op[2], AnnLyric)
-                # color the modified note (in both scores) using Visualization.CHANGED_COLOR
-                note1 = score1.recurse().getElementById(op[1].lyric_holder)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                note1.style.color = Visualization.CHANGED_COLOR
-                textExp = m21.expressions.TextExpression("changed lyric verse id")
-                textExp.style.color = Visualization.CHANGED_COLOR
-                note1.activeSite.insert(note1.offset, textExp)
-
-                note2 = score2.recurse().getElementById(op[2].lyric_holder)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                note2.style.color = Visualization.CHANGED_COLOR
-                textExp = m21.expressions.TextExpression("changed lyric verse id")
-                textExp.style.color = Visualization.CHANGED_COLOR
-                note2.activeSite.insert(note2.offset, textExp)
-                continue
+    @staticmethod
+    def _first_measure_of(staffGroup: m21.layout.StaffGroup) -> m21.stream.Measure | None:
+        """
+        Find the first measure of the first part in a staff group (where we put the
+        TextExpression describing a staff group difference).
 
-            if op[0] == "lyricoffsetedit":
-                assert isinstance(op[1], AnnLyric)
-                assert isinstance(op[2], AnnLyric)
-                # color the modified note (in both scores) using Visualization.CHANGED_COLOR
-                note1 = score1.recurse().getElementById(op[1].lyric_holder)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                note1.style.color = Visualization.CHANGED_COLOR
-                textExp = m21.expressions.TextExpression("changed lyric offset")
-                textExp.style.color = Visualization.CHANGED_COLOR
-                note1.activeSite.insert(note1.offset, textExp)
-
-                note2 = score2.recurse().getElementById(op[2].lyric_holder)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                note2.style.color = Visualization.CHANGED_COLOR
-                textExp = m21.expressions.TextExpression("changed lyric offset")
-                textExp.style.color = Visualization.CHANGED_COLOR
-                note2.activeSite.insert(note2.offset, textExp)
-                continue
+        Args:
+            staffGroup (music21.layout.StaffGroup): The staff group.
 
-            if op[0] == "lyricstyleedit":
-                assert isinstance(op[1], AnnLyric)
-                assert isinstance(op[2], AnnLyric)
-                # color the modified note (in both scores) using Visualization.CHANGED_COLOR
-                note1 = score1.recurse().getElementById(op[1].lyric_holder)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                note1.style.color = Visualization.CHANGED_COLOR
-                textExp = m21.expressions.TextExpression("changed lyric style")
-                textExp.style.color = Visualization.CHANGED_COLOR
-                note1.activeSite.insert(note1.offset, textExp)
-
-                note2 = score2.recurse().getElementById(op[2].lyric_holder)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                note2.style.color = Visualization.CHANGED_COLOR
-                textExp = m21.expressions.TextExpression("changed lyric style")
-                textExp.style.color = Visualization.CHANGED_COLOR
-                note2.activeSite.insert(note2.offset, textExp)
-                continue
+        Returns:
+            music21.stream.Measure | None: The first measure of the first part in
+                staffGroup, or None if there is no such measure.
+        """
+        part: m21.base.Music21Object | None = staffGroup.getFirst()
+        if not isinstance(part, m21.stream.Stream):
+            return None
+        return part.getElementsByClass(m21.stream.Measure).first()
 
-            print(
-                f"Annotation type {op[0]} not yet supported for visualization",
-                file=sys.stderr
-            )
+    @staticmethod
+    def _changed_style_keys(sd1: dict, sd2: dict) -> str:
+        """
+        List the style keys that differ between two style dicts: the keys in sd1
+        that are missing from sd2 (or have a different value there), followed by
+        the keys in sd2 that are missing from sd1.
+
+        Args:
+            sd1 (dict): The first style dict.
+            sd2 (dict): The second style dict.
+
+        Returns:
+            str: The changed keys, separated by commas.
+        """
+        changedKeys: list[str] = [k for k, v in sd1.items() if k not in sd2 or sd2[k] != v]
+        changedKeys.extend(k for k in sd2 if k not in sd1)
+        return ",".join(changedKeys)
 
     @staticmethod
     def show_diffs(
@@ -1611,39 +986,101 @@ class Visualization:
                 (default is None)
         """
         # display the two (presumably annotated) scores
-        originalComposer1: str | None = None
-        originalComposer2: str | None = None
+        hadMetadata1: bool = score1.metadata is not None
+        hadMetadata2: bool = score2.metadata is not None
 
         if score1.metadata is None:
             score1.metadata = m21.metadata.Metadata()
         if score2.metadata is None:
             score2.metadata = m21.metadata.Metadata()
 
-        originalComposer1 = score1.metadata.composer
+        # Save the composer Contributor objects themselves, not the .composer string:
+        # multiple composers come back from .composer joined with ' and ', and names
+        # alone would lose the rest of each Contributor (birth, death, etc).
+        originalComposers1: tuple[m21.metadata.ValueType, ...] = score1.metadata['composer']
+        originalComposers2: tuple[m21.metadata.ValueType, ...] = score2.metadata['composer']
+
+        originalComposer1: str | None = score1.metadata.composer
         if originalComposer1 is None:
             score1.metadata.composer = "score1"
         else:
-            score1.metadata.composer = "score1          " + originalComposer1
+            score1.metadata.composer = f"score1          {originalComposer1}"
 
-        originalComposer2 = score2.metadata.composer
+        originalComposer2: str | None = score2.metadata.composer
         if originalComposer2 is None:
             score2.metadata.composer = "score2"
         else:
-            score2.metadata.composer = "score2          " + originalComposer2
+            score2.metadata.composer = f"score2          {originalComposer2}"
+
+        # The composer changes (and any Metadata we created) are only for the rendering;
+        # put the scores back the way they were when we're done, so they can be rendered
+        # again (without the labels piling up).
+        try:
+            # save files if requested
+            if (out_path1 is not None) and (out_path2 is not None):
+                score1.write("musicxml.pdf", makeNotation=False, fp=out_path1)
+                score2.write("musicxml.pdf", makeNotation=False, fp=out_path2)
+                print(
+                    f"Annotated scores saved in {out_path1} and {out_path2}.",
+                    file=sys.stderr
+                )
+            else:
+                # just display the scores
+                score1.show("musicxml.pdf", makeNotation=False)
+                score2.show("musicxml.pdf", makeNotation=False)
+        finally:
+            if hadMetadata1:
+                score1.metadata['composer'] = originalComposers1
+            else:
+                score1.metadata = None
+            if hadMetadata2:
+                score2.metadata['composer'] = originalComposers2
+            else:
+                score2.metadata = None
 
-        # save files if requested
-        if (out_path1 is not None) and (out_path2 is not None):
-            score1.write("musicxml.pdf", makeNotation=False, fp=out_path1)
-            score2.write("musicxml.pdf", makeNotation=False, fp=out_path2)
-            print(f"Annotated scores saved in {out_path1} and {out_path2}.", file=sys.stderr)
-        else:
-            # just display the scores
-            score1.show("musicxml.pdf", makeNotation=False)
-            score2.show("musicxml.pdf", makeNotation=False)
+    @staticmethod
+    def _location_of(
+        m21obj: m21.base.Music21Object,
+        score: m21.stream.Score,
+        cache: _LocationCache | None = None
+    ) -> str:
+        # get_text_output often asks for the location of the same object more than
+        # once (e.g. several ops on one note), and each computation is a bunch of
+        # music21 hierarchy/context searches, so the caller can pass in a cache
+        # to be used for the duration of one call.
+        if cache is None:
+            return Visualization._compute_location_of(m21obj, score, None)
+
+        key: tuple[int, int] = (id(m21obj), id(score))
+        output: str | None = cache.locations.get(key)
+        if output is None:
+            output = Visualization._compute_location_of(m21obj, score, cache)
+            cache.locations[key] = output
+        return output
 
     @staticmethod
-    def _location_of(m21obj: m21.base.Music21Object, score: m21.stream.Score) -> str:
-        output: str
+    def _staff_number_of(
+        part: m21.stream.Part,
+        score: m21.stream.Score,
+        cache: _LocationCache | None
+    ) -> int:
+        # M21Utils.get_part_index searches score.parts every time, so remember the
+        # answer for each part we see.
+        if cache is None:
+            return M21Utils.get_part_index(part, score) + 1  # staff number is 1-based
+
+        staffNum: int | None = cache.staffNumbers.get(id(part))
+        if staffNum is None:
+            staffNum = M21Utils.get_part_index(part, score) + 1  # staff number is 1-based
+            cache.staffNumbers[id(part)] = staffNum
+        return staffNum
+
+    @staticmethod
+    def _compute_location_of(
+        m21obj: m21.base.Music21Object,
+        score: m21.stream.Score,
+        cache: _LocationCache | None
+    ) -> str:
         meas: m21.stream.Stream | None
         part: m21.stream.Stream | None
         staffNum: int
@@ -1652,8 +1089,7 @@ class Visualization:
         if isinstance(m21obj, (m21.metadata.Metadata, m21.layout.StaffGroup)):
             # These are not in the timeline.  Put them first (there may be a
             # a measure 0/staff 0, but the first beat of that measure is beat 1).
-            output = "measure 0, staff 0, beat 0.0"
-            return output
+            return "measure 0, staff 0, beat 0.0"
 
         if isinstance(m21obj, m21.spanner.RepeatBracket):
             # spans measures, location is start of first measure in RepeatBracket
@@ -1663,26 +1099,22 @@ class Visualization:
             part = score.containerInHierarchy(meas)
             if not isinstance(part, m21.stream.Part):
                 return ""
-            staffNum = M21Utils.get_part_index(part, score)
-            staffNum += 1  # staff number is 1-based
-            output = f"measure {M21Utils.get_measure_number_with_suffix(meas, part)}, "
-            output += f"staff {staffNum}, "
-            fractionalBeats = 1.
-            output += f"beat {M21Utils.ql_to_string(fractionalBeats)}"
-            return output
+            staffNum = Visualization._staff_number_of(part, score, cache)
+            return (
+                f"measure {M21Utils.get_measure_number_with_suffix(meas, part)}, "
+                f"staff {staffNum}, beat 1.0"
+            )
 
         # measure
         if isinstance(m21obj, m21.stream.Measure):
             part = score.containerInHierarchy(m21obj)
             if not isinstance(part, m21.stream.Part):
                 return ""
-            staffNum = M21Utils.get_part_index(part, score)
-            staffNum += 1  # staffNum is 1-based
-            output = f"measure {M21Utils.get_measure_number_with_suffix(m21obj, part)}, "
-            output += f"staff {staffNum}, "
-            fractionalBeats = 1.
-            output += f"beat {M21Utils.ql_to_string(fractionalBeats)}"
-            return output
+            staffNum = Visualization._staff_number_of(part, score, cache)
+            return (
+                f"measure {M21Utils.get_measure_number_with_suffix(m21obj, part)}, "
+                f"staff {staffNum}, beat 1.0"
+            )
 
         # voice
         if isinstance(m21obj, m21.stream.Voice):
@@ -1692,17 +1124,16 @@ class Visualization:
             part = score.containerInHierarchy(meas)
             if not isinstance(part, m21.stream.Part):
                 return ""
-            staffNum = M21Utils.get_part_index(part, score)
-            staffNum += 1  # staffNum is 1-based
+            staffNum = Visualization._staff_number_of(part, score, cache)
             voiceStartOffset: OffsetQL = m21obj.getOffsetInHierarchy(meas)
-            output = f"measure {M21Utils.get_measure_number_with_suffix(meas, part)}, "
-            output += f"staff {staffNum}, "
             ts: m21.meter.TimeSignature | None = m21obj.getContextByClass(m21.meter.TimeSignature)
             if ts is None:
-                ts = m21.meter.TimeSignature()  # 4/4
+                ts = Visualization._DEFAULT_TIME_SIGNATURE
             fractionalBeats = M21Utils.get_beats(voiceStartOffset, ts)
-            output += f"beat {M21Utils.ql_to_string(fractionalBeats)}"
-            return output
+            return (
+                f"measure {M21Utils.get_measure_number_with_suffix(meas, part)}, "
+                f"staff {staffNum}, beat {M21Utils.ql_to_string(fractionalBeats)}"
+            )
 
         # spanner
         if isinstance(m21obj, m21.spanner.Spanner):
@@ -1713,30 +1144,142 @@ class Visualization:
             # fall through to handle normal non-stream/non-spanner m21obj
 
         # normal object (not stream, not spanner)
-        container: m21.stream.Stream | None = score.containerInHierarchy(m21obj)
-        if isinstance(container, m21.stream.Measure):
-            meas = container
-        elif isinstance(container, m21.stream.Voice):
-            meas = score.containerInHierarchy(container)
-            if not isinstance(meas, m21.stream.Measure):
-                return ""
-        else:
+        # The activeSites usually lead straight to the measure and part, and following
+        # them is much cheaper than searching the score with containerInHierarchy, so
+        # try that first.  If we don't end up in one of score's parts (activeSite can
+        # be stale), do the search.
+        meas, part = Visualization._measure_and_part_of(m21obj, score, True)
+        if part is None or Visualization._staff_number_of(part, score, cache) == 0:
+            meas, part = Visualization._measure_and_part_of(m21obj, score, False)
+        if meas is None or part is None:
             return ""
 
-        part = score.containerInHierarchy(meas)
-        if not isinstance(part, m21.stream.Part):
-            return ""
-        staffNum = M21Utils.get_part_index(part, score)
-        staffNum += 1  # staffNum is 1-based
+        staffNum = Visualization._staff_number_of(part, score, cache)
         startOffset: OffsetQL = m21obj.getOffsetInHierarchy(meas)
-        output = f"measure {M21Utils.get_measure_number_with_suffix(meas, part)}, "
-        output += f"staff {staffNum}, "
         ts = m21obj.getContextByClass(m21.meter.TimeSignature)
         if ts is None:
-            ts = m21.meter.TimeSignature()  # 4/4
+            ts = Visualization._DEFAULT_TIME_SIGNATURE
         fractionalBeats = M21Utils.get_beats(startOffset, ts)
-        output += f"beat {M21Utils.ql_to_string(fractionalBeats)}"
-        return output
+        return (
+            f"measure {M21Utils.get_measure_number_with_suffix(meas, part)}, "
+            f"staff {staffNum}, beat {M21Utils.ql_to_string(fractionalBeats)}"
+        )
+
+    @staticmethod
+    def _measure_and_part_of(
+        m21obj: m21.base.Music21Object,
+        score: m21.stream.Score,
+        useActiveSites: bool
+    ) -> tuple[m21.stream.Measure | None, m21.stream.Part | None]:
+        """
+        Find the measure and part containing m21obj (possibly via a voice).
+
+        Args:
+            m21obj (music21.base.Music21Object): The object (not a stream or spanner).
+            score (music21.stream.Score): The score containing m21obj.
+            useActiveSites (bool): Whether to follow activeSites (fast, but they might
+                be stale) where possible, instead of searching score.
+
+        Returns:
+            tuple[music21.stream.Measure | None, music21.stream.Part | None]: The
+                measure and part, or (None, None) if they could not be found.
+        """
+        def containerOf(el: m21.base.Music21Object) -> m21.stream.Stream | None:
+            if useActiveSites:
+                site: m21.stream.Stream | None = el.activeSite
+                if isinstance(site, (m21.stream.Measure, m21.stream.Voice, m21.stream.Part)):
+                    return site
+            return score.containerInHierarchy(el)
+
+        meas: m21.stream.Stream | None = containerOf(m21obj)
+        if isinstance(meas, m21.stream.Voice):
+            meas = containerOf(meas)
+        if not isinstance(meas, m21.stream.Measure):
+            return None, None
+
+        part: m21.stream.Stream | None = containerOf(meas)
+        if not isinstance(part, m21.stream.Part):
+            return None, None
+        return meas, part
+
+    @staticmethod
+    def _add_text_change(
+        outputList: list[str],
+        locCache: _LocationCache,
+        *,
+        el1: m21.base.Music21Object,
+        score1: m21.stream.Score,
+        line1: str,
+        el2: m21.base.Music21Object,
+        score2: m21.stream.Score,
+        line2: str,
+        sameLocation: bool
+    ) -> None:
+        """
+        Add the text output describing a change to outputList: the "-" line for el1
+        and the "+" line for el2 under one location header if sameLocation, or each
+        under its own location header if not.
+
+        Args:
+            outputList (list[str]): The text output entries so far.
+            locCache (_LocationCache): The location cache (see `_location_of`).
+            el1 (music21.base.Music21Object): The changed object in score1.
+            score1 (music21.stream.Score): The first score.
+            line1 (str): The "-" line describing el1.
+            el2 (music21.base.Music21Object): The changed object in score2.
+            score2 (music21.stream.Score): The second score.
+            line2 (str): The "+" line describing el2.
+            sameLocation (bool): Whether el1 and el2 are at the same location.
+        """
+        if sameLocation:
+            outputList.append(
+                f"@@ {Visualization._location_of(el1, score1, locCache)} @@\n{line1}\n{line2}"
+            )
+            return
+
+        outputList.append(f"@@ {Visualization._location_of(el1, score1, locCache)} @@\n{line1}")
+        outputList.append(f"@@ {Visualization._location_of(el2, score2, locCache)} @@\n{line2}")
+
+    @staticmethod
+    def _location_sort_key(entry: str) -> tuple[int, str, int, OffsetQL]:
+        # Parses the location at the start of a text output entry (e.g.
+        # "@@ measure 3b, staff 2, beat 1.5 @@") into (measure number, measure
+        # number suffix, staff number, beat).  Entries with no (parseable) location
+        # get -1/''/-1/0. for the missing parts.
+        m = _LOC_RE.match(entry)
+        if not m:
+            return (-1, '', -1, 0.)
+
+        measNum: int = -1
+        try:
+            measNum = int(m.group(1))
+        except Exception:
+            pass
+
+        staffNum: int = -1
+        try:
+            staffNum = int(m.group(3))
+        except Exception:
+            pass
+
+        # beat can be of the form "j n/m" (mixed), "n/m" (Fraction), or "n.m" (float).
+        # The beat is only compared (floats and Fractions compare exactly), so there
+        # is no need to opFrac it.
+        beatStr: str = m.group(4)
+        beats: OffsetQL = 0.
+        try:
+            if "/" not in beatStr:
+                beats = float(beatStr)
+            elif " " in beatStr:
+                # mixed fraction "j n/m"
+                wholeNum, frac = beatStr.split(' ')
+                beats = int(wholeNum) + Fraction(frac)
+            else:
+                beats = Fraction(beatStr)
+        except Exception:
+            pass
+
+        return (measNum, m.group(2), staffNum, beats)
 
     @staticmethod
     def get_text_output(
@@ -1760,1059 +1303,386 @@ class Visualization:
         """
         output: str
         outputList: list[str] = []
-        oneOutput: str  # one string, multiple lines (with \n at end of all but last line)
+
+        # look up the music21 objects by id in these maps, instead of searching
+        # the whole score (score.recurse().getElementById) for each op.
+        id_map1: _ElementIdMap = _ElementIdMap(score1)
+        id_map2: _ElementIdMap = _ElementIdMap(score2)
+
+        # locations of the music21 objects referenced by the ops, so we only
+        # compute each one once (see _location_of).
+        locCache: _LocationCache = _LocationCache()
 
         for op in operations:
+            # ops are (opName, ann1, ann2, cost[, indices]) tuples; fetch the name once,
+            # instead of indexing the tuple again for every opName test below.
+            opName: str = op[0]
+
+            # many note ops just report the before and after values of one attribute.
+            kind: str | None = Visualization._TEXT_NOTE_OPS.get(opName)
+            if kind is not None:
+                assert isinstance(op[1], AnnNote)
+                assert isinstance(op[2], AnnNote)
+                note1 = id_map1[op[1].general_note]  # type: ignore
+                note2 = id_map2[op[2].general_note]  # type: ignore
+                outputList.append(
+                    f"@@ {Visualization._location_of(note1, score1, locCache)} @@\n"
+                    f"-({note1.classes[0]}:{kind}) {op[1].readable_str(kind)}\n"
+                    f"+({note2.classes[0]}:{kind}) {op[2].readable_str(kind)}"
+                )
+                continue
+
+            # and for the note ops that might be about just one note in a chord.
+            kind = Visualization._TEXT_CHORD_NOTE_OPS.get(opName)
+            if kind is not None:
+                assert isinstance(op[1], AnnNote)
+                assert isinstance(op[2], AnnNote)
+                assert len(op) == 5  # the indices must be there
+                chord1, note1, idx = Visualization._chord_and_note(
+                    id_map1, op[1], op[4][0], False
+                )
+                chord2, note2, idx = Visualization._chord_and_note(
+                    id_map2, op[2], op[4][1], False
+                )
+                outputList.append(
+                    f"@@ {Visualization._location_of(chord1, score1, locCache)} @@\n"
+                    f"-({note1.classes[0]}:{kind}) {op[1].readable_str(kind, idx=idx)}\n"
+                    f"+({note2.classes[0]}:{kind}) {op[2].readable_str(kind, idx=idx)}"
+                )
+                continue
+
+            # likewise for most staff group ops.
+            kind = Visualization._TEXT_STAFF_GROUP_OPS.get(opName)
+            if kind is not None:
+                assert isinstance(op[1], AnnStaffGroup)
+                assert isinstance(op[2], AnnStaffGroup)
+                staffGroup1 = id_map1[op[1].staff_group]  # type: ignore
+                outputList.append(
+                    f"@@ {Visualization._location_of(staffGroup1, score1, locCache)} @@\n"
+                    f"-(StaffGroup:{kind}) {op[1].readable_str(kind)}\n"
+                    f"+(StaffGroup:{kind}) {op[2].readable_str(kind)}"
+                )
+                continue
+
+            # and for most extra ops (where the change is reported in one place if
+            # the extra hasn't moved, or in two places if it has).
+            extraOp: tuple[str, str] | None = Visualization._TEXT_EXTRA_OPS.get(opName)
+            if extraOp is not None:
+                assert isinstance(op[1], AnnExtra)
+                assert isinstance(op[2], AnnExtra)
+                tag, kind = extraOp
+                extra1 = id_map1[op[1].extra]  # type: ignore
+                extra2 = id_map2[op[2].extra]  # type: ignore
+                Visualization._add_text_change(
+                    outputList, locCache,
+                    el1=extra1, score1=score1,
+                    line1=f"-({extra1.classes[0]}{tag}) {op[1].readable_str(kind)}",
+                    el2=extra2, score2=score2,
+                    line2=f"+({extra2.classes[0]}{tag}) {op[2].readable_str(kind)}",
+                    sameLocation=op[1].offset == op[2].offset
+                )
+                continue
+
+            # and for most lyric ops.
+            lyricOp: tuple[str, str] | None = Visualization._TEXT_LYRIC_OPS.get(opName)
+            if lyricOp is not None:
+                assert isinstance(op[1], AnnLyric)
+                assert isinstance(op[2], AnnLyric)
+                tag, kind = lyricOp
+                note1 = id_map1[op[1].lyric_holder]  # type: ignore
+                note2 = id_map2[op[2].lyric_holder]  # type: ignore
+                Visualization._add_text_change(
+                    outputList, locCache,
+                    el1=note1, score1=score1,
+                    line1=f"-(Lyric{tag}) {op[1].readable_str(kind)}",
+                    el2=note2, score2=score2,
+                    line2=f"+(Lyric{tag}) {op[2].readable_str(kind)}",
+                    sameLocation=op[1].offset == op[2].offset
+                )
+                continue
+
+            # and for most metadata item ops.
+            mdTag: str | None = Visualization._TEXT_METADATA_OPS.get(opName)
+            if mdTag is not None:
+                assert isinstance(op[1], AnnMetadataItem)
+                assert isinstance(op[2], AnnMetadataItem)
+                outputList.append(
+                    f"@@ {Visualization._location_of(score1.metadata, score1, locCache)} @@\n"
+                    f"-(metadata{mdTag}) {op[1].readable_str()}\n"
+                    f"+(metadata{mdTag}) {op[2].readable_str()}"
+                )
+                continue
+
             # bar
-            if op[0] == "insbar":
+            if opName == "insbar":
                 assert isinstance(op[2], AnnMeasure)
-                measure2 = score2.recurse().getElementById(op[2].measure)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert measure2 is not None
-                newLine: str = f"@@ {Visualization._location_of(measure2, score2)} @@\n"
-                oneOutput = newLine
-                newLine = f"+(measure) {op[2].readable_str()}"
-                oneOutput += newLine
-                outputList.append(oneOutput)
+                measure2 = id_map2[op[2].measure]  # type: ignore
+                outputList.append(
+                    f"@@ {Visualization._location_of(measure2, score2, locCache)} @@\n"
+                    f"+(measure) {op[2].readable_str()}"
+                )
                 continue
 
-            if op[0] == "delbar":
+            if opName == "delbar":
                 assert isinstance(op[1], AnnMeasure)
-                measure1 = score1.recurse().getElementById(op[1].measure)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert measure1 is not None
-                newLine = f"@@ {Visualization._location_of(measure1, score1)} @@\n"
-                oneOutput = newLine
-                newLine = f"-(measure) {op[1].readable_str()}"
-                oneOutput += newLine
-                outputList.append(oneOutput)
+                measure1 = id_map1[op[1].measure]  # type: ignore
+                outputList.append(
+                    f"@@ {Visualization._location_of(measure1, score1, locCache)} @@\n"
+                    f"-(measure) {op[1].readable_str()}"
+                )
                 continue
 
             # voices
-            if op[0] == "voiceins":
+            if opName == "voiceins":
                 assert isinstance(op[2], AnnVoice)
-                voice2 = score2.recurse().getElementById(op[2].voice)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert voice2 is not None
-                newLine = f"@@ {Visualization._location_of(voice2, score2)} @@\n"
-                oneOutput = newLine
-                newLine = f"+(voice) {op[2].readable_str()}"
-                oneOutput += newLine
-                outputList.append(oneOutput)
+                voice2 = id_map2[op[2].voice]  # type: ignore
+                outputList.append(
+                    f"@@ {Visualization._location_of(voice2, score2, locCache)} @@\n"
+                    f"+(voice) {op[2].readable_str()}"
+                )
                 continue
 
-            if op[0] == "voicedel":
+            if opName == "voicedel":
                 assert isinstance(op[1], AnnVoice)
-                voice1 = score1.recurse().getElementById(op[1].voice)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert voice1 is not None
-                newLine = f"@@ {Visualization._location_of(voice1, score1)} @@\n"
-                oneOutput = newLine
-                newLine = f"-(voice) {op[1].readable_str()}"
-                oneOutput += newLine
-                outputList.append(oneOutput)
+                voice1 = id_map1[op[1].voice]  # type: ignore
+                outputList.append(
+                    f"@@ {Visualization._location_of(voice1, score1, locCache)} @@\n"
+                    f"-(voice) {op[1].readable_str()}"
+                )
                 continue
 
             # extra
-            if op[0] == "extrains":
+            if opName == "extrains":
                 assert isinstance(op[2], AnnExtra)
-                extra2 = score2.recurse().getElementById(op[2].extra)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert extra2 is not None
-                newLine = f"@@ {Visualization._location_of(extra2, score2)} @@\n"
-                oneOutput = newLine
-                newLine = f"+({extra2.classes[0]}) {op[2].readable_str()}"
-                oneOutput += newLine
-                outputList.append(oneOutput)
-                continue
-
-            if op[0] == "extradel":
-                assert isinstance(op[1], AnnExtra)
-                extra1 = score1.recurse().getElementById(op[1].extra)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert extra1 is not None
-                newLine = f"@@ {Visualization._location_of(extra1, score1)} @@\n"
-                oneOutput = newLine
-                newLine = f"-({extra1.classes[0]}) {op[1].readable_str()}"
-                oneOutput += newLine
-                outputList.append(oneOutput)
-                continue
-
-            if op[0] == "extrasub":
-                assert isinstance(op[1], AnnExtra)
-                assert isinstance(op[2], AnnExtra)
-                extra1 = score1.recurse().getElementById(op[1].extra)  # type: ignore
-                extra2 = score2.recurse().getElementById(op[2].extra)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert extra1 is not None
-                    assert extra2 is not None
-                newLine = f"@@ {Visualization._location_of(extra1, score1)} @@\n"
-                oneOutput = newLine
-                newLine = f"-({extra1.classes[0]}) {op[1].readable_str()}"
-                oneOutput += newLine
-                if op[1].offset != op[2].offset:
-                    outputList.append(oneOutput)
-                    newLine = f"@@ {Visualization._location_of(extra2, score2)} @@\n"
-                    oneOutput = newLine
-                else:
-                    oneOutput += "\n"
-                newLine = f"+({extra2.classes[0]}) {op[2].readable_str()}"
-                oneOutput += newLine
-                outputList.append(oneOutput)
+                extra2 = id_map2[op[2].extra]  # type: ignore
+                outputList.append(
+                    f"@@ {Visualization._location_of(extra2, score2, locCache)} @@\n"
+                    f"+({extra2.classes[0]}) {op[2].readable_str()}"
+                )
                 continue
 
-            if op[0] == "extracontentedit":
+            if opName == "extradel":
                 assert isinstance(op[1], AnnExtra)
-                assert isinstance(op[2], AnnExtra)
-                extra1 = score1.recurse().getElementById(op[1].extra)  # type: ignore
-                extra2 = score2.recurse().getElementById(op[2].extra)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert extra1 is not None
-                    assert extra2 is not None
-                newLine = f"@@ {Visualization._location_of(extra1, score1)} @@\n"
-                oneOutput = newLine
-                newLine = f"-({extra1.classes[0]}:content) {op[1].readable_str('content')}"
-                oneOutput += newLine
-                if op[1].offset != op[2].offset:
-                    outputList.append(oneOutput)
-                    newLine = f"@@ {Visualization._location_of(extra2, score2)} @@\n"
-                    oneOutput = newLine
-                else:
-                    oneOutput += "\n"
-                newLine = f"+({extra2.classes[0]}:content) {op[2].readable_str('content')}"
-                oneOutput += newLine
-                outputList.append(oneOutput)
+                extra1 = id_map1[op[1].extra]  # type: ignore
+                outputList.append(
+                    f"@@ {Visualization._location_of(extra1, score1, locCache)} @@\n"
+                    f"-({extra1.classes[0]}) {op[1].readable_str()}"
+                )
                 continue
 
-            if op[0] == "extraoffsetedit":
+            if opName == "extraoffsetedit":
                 assert isinstance(op[1], AnnExtra)
                 assert isinstance(op[2], AnnExtra)
-                extra1 = score1.recurse().getElementById(op[1].extra)  # type: ignore
-                extra2 = score2.recurse().getElementById(op[2].extra)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert extra1 is not None
-                    assert extra2 is not None
-                newLine = f"@@ {Visualization._location_of(extra1, score1)} @@\n"
-                oneOutput = newLine
-                newLine = f"-({extra1.classes[0]}:offset) {op[1].readable_str('offset')}"
-                oneOutput += newLine
-                outputList.append(oneOutput)
-
-                newLine = f"@@ {Visualization._location_of(extra2, score2)} @@\n"
-                oneOutput = newLine
-                newLine = f"+({extra2.classes[0]}:offset) {op[2].readable_str('offset')}"
-                oneOutput += newLine
-                outputList.append(oneOutput)
+                extra1 = id_map1[op[1].extra]  # type: ignore
+                extra2 = id_map2[op[2].extra]  # type: ignore
+                Visualization._add_text_change(
+                    outputList, locCache,
+                    el1=extra1, score1=score1,
+                    line1=f"-({extra1.classes[0]}:offset) {op[1].readable_str('offset')}",
+                    el2=extra2, score2=score2,
+                    line2=f"+({extra2.classes[0]}:offset) {op[2].readable_str('offset')}",
+                    sameLocation=False
+                )
                 continue
 
-            if op[0] == "extradurationedit":
+            if opName == "extrastyleedit":
                 assert isinstance(op[1], AnnExtra)
                 assert isinstance(op[2], AnnExtra)
-                extra1 = score1.recurse().getElementById(op[1].extra)  # type: ignore
-                extra2 = score2.recurse().getElementById(op[2].extra)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert extra1 is not None
-                    assert extra2 is not None
-                newLine = f"@@ {Visualization._location_of(extra1, score1)} @@\n"
-                oneOutput = newLine
-                newLine = f"-({extra1.classes[0]}:dur) {op[1].readable_str('duration')}"
-                oneOutput += newLine
-                if op[1].offset != op[2].offset:
-                    outputList.append(oneOutput)
-                    newLine = f"@@ {Visualization._location_of(extra2, score2)} @@\n"
-                    oneOutput = newLine
-                else:
-                    oneOutput += "\n"
-                newLine = f"+({extra2.classes[0]}:dur) {op[2].readable_str('duration')}"
-                oneOutput += newLine
-                outputList.append(oneOutput)
-                continue
+                changedStr = Visualization._changed_style_keys(
+                    op[1].styledict, op[2].styledict
+                )
 
-            if op[0] == "extrastyleedit":
-                assert isinstance(op[1], AnnExtra)
-                assert isinstance(op[2], AnnExtra)
-                sd1 = op[1].styledict
-                sd2 = op[2].styledict
-                changedStr = ""
-                for k1, v1 in sd1.items():
-                    if k1 not in sd2 or sd2[k1] != v1:
-                        if changedStr:
-                            changedStr += ","
-                        changedStr += k1
-
-                # one last thing: check for keys in sd2 that aren't in sd1
-                for k2 in sd2:
-                    if k2 not in sd1:
-                        if changedStr:
-                            changedStr += ","
-                        changedStr += k2
-
-                extra1 = score1.recurse().getElementById(op[1].extra)  # type: ignore
-                extra2 = score2.recurse().getElementById(op[2].extra)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert extra1 is not None
-                    assert extra2 is not None
-                newLine = f"@@ {Visualization._location_of(extra1, score1)} @@\n"
-                oneOutput = newLine
+                extra1 = id_map1[op[1].extra]  # type: ignore
+                extra2 = id_map2[op[2].extra]  # type: ignore
                 style1: str = op[1].readable_str('style', changedStr=changedStr)
                 style2: str = op[2].readable_str('style', changedStr=changedStr)
-                newLine = f"-({extra1.classes[0]}:{changedStr}) {style1}"
-                oneOutput += newLine
-                if op[1].offset != op[2].offset:
-                    outputList.append(oneOutput)
-                    newLine = f"@@ {Visualization._location_of(extra2, score2)} @@\n"
-                    oneOutput = newLine
-                else:
-                    oneOutput += "\n"
-                newLine = f"+({extra2.classes[0]}:{changedStr}) {style2}"
-                oneOutput += newLine
-                outputList.append(oneOutput)
+                Visualization._add_text_change(
+                    outputList, locCache,
+                    el1=extra1, score1=score1,
+                    line1=f"-({extra1.classes[0]}:{changedStr}) {style1}",
+                    el2=extra2, score2=score2,
+                    line2=f"+({extra2.classes[0]}:{changedStr}) {style2}",
+                    sameLocation=op[1].offset == op[2].offset
+                )
                 continue
 
             # staff groups
-            if op[0] == "staffgrpins":
-                assert isinstance(op[2], AnnStaffGroup)
-                staffGroup2 = score2.recurse().getElementById(
-                    op[2].staff_group  # type: ignore
-                )
-                if t.TYPE_CHECKING:
-                    assert staffGroup2 is not None
-                newLine = f"@@ {Visualization._location_of(staffGroup2, score2)} @@\n"
-                oneOutput = newLine
-                newLine = f"+(StaffGroup) {op[2].readable_str()}"
-                oneOutput += newLine
-                outputList.append(oneOutput)
-                continue
-
-            if op[0] == "staffgrpdel":
-                assert isinstance(op[1], AnnStaffGroup)
-                staffGroup1 = score1.recurse().getElementById(
-                    op[1].staff_group  # type: ignore
-                )
-                if t.TYPE_CHECKING:
-                    assert staffGroup1 is not None
-                newLine = f"@@ {Visualization._location_of(staffGroup1, score1)} @@\n"
-                oneOutput = newLine
-                newLine = f"-(StaffGroup) {op[1].readable_str()}"
-                oneOutput += newLine
-                outputList.append(oneOutput)
-                continue
-
-            if op[0] == "staffgrpsub":
-                assert isinstance(op[1], AnnStaffGroup)
-                assert isinstance(op[2], AnnStaffGroup)
-                staffGroup1 = score1.recurse().getElementById(
-                    op[1].staff_group  # type: ignore
-                )
-                staffGroup2 = score2.recurse().getElementById(
-                    op[2].staff_group  # type: ignore
-                )
-                if t.TYPE_CHECKING:
-                    assert staffGroup1 is not None
-                    assert staffGroup2 is not None
-                newLine = f"@@ {Visualization._location_of(staffGroup1, score1)} @@\n"
-                oneOutput = newLine
-                newLine = f"-(StaffGroup) {op[1].readable_str()}\n"
-                oneOutput += newLine
-                newLine = f"+(StaffGroup) {op[2].readable_str()}"
-                oneOutput += newLine
-                outputList.append(oneOutput)
-                continue
-
-            if op[0] == "staffgrpnameedit":
-                assert isinstance(op[1], AnnStaffGroup)
-                assert isinstance(op[2], AnnStaffGroup)
-                staffGroup1 = score1.recurse().getElementById(
-                    op[1].staff_group  # type: ignore
-                )
-                staffGroup2 = score2.recurse().getElementById(
-                    op[2].staff_group  # type: ignore
-                )
-                if t.TYPE_CHECKING:
-                    assert staffGroup1 is not None
-                    assert staffGroup2 is not None
-                newLine = f"@@ {Visualization._location_of(staffGroup1, score1)} @@\n"
-                oneOutput = newLine
-                newLine = f"-(StaffGroup:name) {op[1].readable_str('name')}\n"
-                oneOutput += newLine
-                newLine = f"+(StaffGroup:name) {op[2].readable_str('name')}"
-                oneOutput += newLine
-                outputList.append(oneOutput)
-                continue
-
-            if op[0] == "staffgrpabbreviationedit":
-                assert isinstance(op[1], AnnStaffGroup)
-                assert isinstance(op[2], AnnStaffGroup)
-                staffGroup1 = score1.recurse().getElementById(
-                    op[1].staff_group  # type: ignore
-                )
-                staffGroup2 = score2.recurse().getElementById(
-                    op[2].staff_group  # type: ignore
-                )
-                if t.TYPE_CHECKING:
-                    assert staffGroup1 is not None
-                    assert staffGroup2 is not None
-                newLine = f"@@ {Visualization._location_of(staffGroup1, score1)} @@\n"
-                oneOutput = newLine
-                newLine = f"-(StaffGroup:abbr) {op[1].readable_str('abbr')}\n"
-                oneOutput += newLine
-                newLine = f"+(StaffGroup:abbr) {op[2].readable_str('abbr')}"
-                oneOutput += newLine
-                outputList.append(oneOutput)
-                continue
-
-            if op[0] == "staffgrpsymboledit":
-                assert isinstance(op[1], AnnStaffGroup)
+            if opName == "staffgrpins":
                 assert isinstance(op[2], AnnStaffGroup)
-                staffGroup1 = score1.recurse().getElementById(
-                    op[1].staff_group  # type: ignore
-                )
-                staffGroup2 = score2.recurse().getElementById(
-                    op[2].staff_group  # type: ignore
-                )
-                if t.TYPE_CHECKING:
-                    assert staffGroup1 is not None
-                    assert staffGroup2 is not None
-                newLine = f"@@ {Visualization._location_of(staffGroup1, score1)} @@\n"
-                oneOutput = newLine
-                newLine = f"-(StaffGroup:sym) {op[1].readable_str('sym')}\n"
-                oneOutput += newLine
-                newLine = f"+(StaffGroup:sym) {op[2].readable_str('sym')}"
-                oneOutput += newLine
-                outputList.append(oneOutput)
+                staffGroup2 = id_map2[op[2].staff_group]  # type: ignore
+                outputList.append(
+                    f"@@ {Visualization._location_of(staffGroup2, score2, locCache)} @@\n"
+                    f"+(StaffGroup) {op[2].readable_str()}"
+                )
                 continue
 
-            if op[0] == "staffgrpbartogetheredit":
+            if opName == "staffgrpdel":
                 assert isinstance(op[1], AnnStaffGroup)
-                assert isinstance(op[2], AnnStaffGroup)
-                staffGroup1 = score1.recurse().getElementById(
-                    op[1].staff_group  # type: ignore
-                )
-                staffGroup2 = score2.recurse().getElementById(
-                    op[2].staff_group  # type: ignore
-                )
-                if t.TYPE_CHECKING:
-                    assert staffGroup1 is not None
-                    assert staffGroup2 is not None
-                newLine = f"@@ {Visualization._location_of(staffGroup1, score1)} @@\n"
-                oneOutput = newLine
-                newLine = f"-(StaffGroup:barline) {op[1].readable_str('barline')}\n"
-                oneOutput += newLine
-                newLine = f"+(StaffGroup:barline) {op[2].readable_str('barline')}"
-                oneOutput += newLine
-                outputList.append(oneOutput)
+                staffGroup1 = id_map1[op[1].staff_group]  # type: ignore
+                outputList.append(
+                    f"@@ {Visualization._location_of(staffGroup1, score1, locCache)} @@\n"
+                    f"-(StaffGroup) {op[1].readable_str()}"
+                )
                 continue
 
-            if op[0] == "staffgrppartindicesedit":
+            if opName == "staffgrpsub":
                 assert isinstance(op[1], AnnStaffGroup)
                 assert isinstance(op[2], AnnStaffGroup)
-                staffGroup1 = score1.recurse().getElementById(
-                    op[1].staff_group  # type: ignore
-                )
-                staffGroup2 = score2.recurse().getElementById(
-                    op[2].staff_group  # type: ignore
-                )
-                if t.TYPE_CHECKING:
-                    assert staffGroup1 is not None
-                    assert staffGroup2 is not None
-                newLine = f"@@ {Visualization._location_of(staffGroup1, score1)} @@\n"
-                oneOutput = newLine
-                newLine = f"-(StaffGroup:parts) {op[1].readable_str('parts')}\n"
-                oneOutput += newLine
-                newLine = f"+(StaffGroup:parts) {op[2].readable_str('parts')}"
-                oneOutput += newLine
-                outputList.append(oneOutput)
+                staffGroup1 = id_map1[op[1].staff_group]  # type: ignore
+                staffGroup2 = id_map2[op[2].staff_group]  # type: ignore
+                outputList.append(
+                    f"@@ {Visualization._location_of(staffGroup1, score1, locCache)} @@\n"
+                    f"-(StaffGroup) {op[1].readable_str()}\n"
+                    f"+(StaffGroup) {op[2].readable_str()}"
+                )
                 continue
 
             # note
-            if op[0] == "noteins":
+            if opName == "noteins":
                 assert isinstance(op[2], AnnNote)
                 # The note that was inserted may in fact be a note within a chord,
                 # so be careful to use the chord and the note in that case for
                 # the appropriate operations.
-                noteOrChord2 = score2.recurse().getElementById(op[2].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert noteOrChord2 is not None
+                noteOrChord2 = id_map2[op[2].general_note]  # type: ignore
                 if len(op) >= 5 and op[4] is not None:
-                    note2 = noteOrChord2.notes[op[4]]
+                    assert isinstance(noteOrChord2, m21.chord.Chord)
+                    note2 = noteOrChord2._notes[op[4]]
                 else:
                     note2 = noteOrChord2
-                newLine = f"@@ {Visualization._location_of(noteOrChord2, score2)} @@\n"
-                oneOutput = newLine
-                newLine = f"+({note2.classes[0]}) {op[2].readable_str()}"
-                oneOutput += newLine
-                outputList.append(oneOutput)
+                outputList.append(
+                    f"@@ {Visualization._location_of(noteOrChord2, score2, locCache)} @@\n"
+                    f"+({note2.classes[0]}) {op[2].readable_str()}"
+                )
                 continue
 
-            if op[0] == "notedel":
+            if opName == "notedel":
                 assert isinstance(op[1], AnnNote)
                 # The note that was deleted may in fact be a note within a chord,
                 # so be careful to use the chord and the note in that case for
                 # the appropriate operations.
-                noteOrChord1 = score1.recurse().getElementById(op[1].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert noteOrChord1 is not None
+                noteOrChord1 = id_map1[op[1].general_note]  # type: ignore
                 if len(op) >= 5 and op[4] is not None:
-                    note1 = noteOrChord1.notes[op[4]]
+                    assert isinstance(noteOrChord1, m21.chord.Chord)
+                    note1 = noteOrChord1._notes[op[4]]
                 else:
                     note1 = noteOrChord1
-                newLine = f"@@ {Visualization._location_of(noteOrChord1, score1)} @@\n"
-                oneOutput = newLine
-                newLine = f"-({note1.classes[0]}) {op[1].readable_str()}"
-                oneOutput += newLine
-                outputList.append(oneOutput)
+                outputList.append(
+                    f"@@ {Visualization._location_of(noteOrChord1, score1, locCache)} @@\n"
+                    f"-({note1.classes[0]}) {op[1].readable_str()}"
+                )
                 continue
 
             # pitch
-            if op[0] == "pitchnameedit":
+            if opName == "pitchnameedit":
                 assert isinstance(op[1], AnnNote)
                 assert isinstance(op[2], AnnNote)
                 assert len(op) == 5  # the indices must be there
-                chord1 = score1.recurse().getElementById(op[1].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert chord1 is not None
-                note1 = chord1
-                if not op[1].is_in_chord and "Chord" in chord1.classes:
-                    # report just the indexed note in the chord
-                    idx = op[4][0]
-                    note1 = chord1.notes[idx]
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                chord2 = score2.recurse().getElementById(op[2].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert chord2 is not None
-                note2 = chord2
-                if not op[2].is_in_chord and "Chord" in chord2.classes:
-                    # report just the indexed note in the chord
-                    idx = op[4][1]
-                    note2 = chord2.notes[idx]
-                else:
-                    idx = 0
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                newLine = f"@@ {Visualization._location_of(chord1, score1)} @@\n"
-                oneOutput = newLine
-                newLine = f"-({note1.classes[0]}:pitch) {op[1].readable_str('pitch', idx=idx)}\n"
-                oneOutput += newLine
-                newLine = f"+({note2.classes[0]}:pitch) {op[2].readable_str('pitch', idx=idx)}"
-                oneOutput += newLine
-                outputList.append(oneOutput)
+                chord1, note1, idx = Visualization._chord_and_note(
+                    id_map1, op[1], op[4][0], True
+                )
+                chord2, note2, idx = Visualization._chord_and_note(
+                    id_map2, op[2], op[4][1], True
+                )
+                outputList.append(
+                    f"@@ {Visualization._location_of(chord1, score1, locCache)} @@\n"
+                    f"-({note1.classes[0]}:pitch) {op[1].readable_str('pitch', idx=idx)}\n"
+                    f"+({note2.classes[0]}:pitch) {op[2].readable_str('pitch', idx=idx)}"
+                )
                 continue
 
-            if op[0] == "inspitch":
+            if opName == "inspitch":
                 assert isinstance(op[2], AnnNote)
                 assert len(op) == 5  # the indices must be there
-                chord2 = score2.recurse().getElementById(op[2].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert chord2 is not None
-                note2 = chord2
-                if not op[2].is_in_chord and "Chord" in chord2.classes:
-                    # report just the indexed note in the chord
-                    idx = op[4][1]
-                    note2 = chord2.notes[idx]
-                else:
-                    idx = 0
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                newLine = f"@@ {Visualization._location_of(chord2, score2)} @@\n"
-                oneOutput = newLine
-                newLine = f"+({note2.classes[0]}:pitch) {op[2].readable_str('pitch', idx=idx)}"
-                oneOutput += newLine
-                outputList.append(oneOutput)
+                chord2, note2, idx = Visualization._chord_and_note(
+                    id_map2, op[2], op[4][1], True
+                )
+                outputList.append(
+                    f"@@ {Visualization._location_of(chord2, score2, locCache)} @@\n"
+                    f"+({note2.classes[0]}:pitch) {op[2].readable_str('pitch', idx=idx)}"
+                )
                 continue
 
-            if op[0] == "delpitch":
+            if opName == "delpitch":
                 assert isinstance(op[1], AnnNote)
                 assert len(op) == 5  # the indices must be there
-                chord1 = score1.recurse().getElementById(op[1].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert chord1 is not None
-                note1 = chord1
-                if "Chord" in chord1.classes:
-                    # report just the indexed note in the chord
-                    idx = op[4][0]
-                    note1 = chord1.notes[idx]
-                else:
-                    idx = 0
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                newLine = f"@@ {Visualization._location_of(chord1, score1)} @@\n"
-                oneOutput = newLine
-                newLine = f"-({note1.classes[0]}:pitch) {op[1].readable_str('pitch', idx=idx)}"
-                oneOutput += newLine
-                outputList.append(oneOutput)
-                continue
-
-            if op[0] == "headedit":
-                assert isinstance(op[1], AnnNote)
-                assert isinstance(op[2], AnnNote)
-                note1 = score1.recurse().getElementById(op[1].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                note2 = score2.recurse().getElementById(op[2].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                newLine = f"@@ {Visualization._location_of(note1, score1)} @@\n"
-                oneOutput = newLine
-                newLine = f"-({note1.classes[0]}:head) {op[1].readable_str('head')}\n"
-                oneOutput += newLine
-                newLine = f"+({note2.classes[0]}:head) {op[2].readable_str('head')}"
-                oneOutput += newLine
-                outputList.append(oneOutput)
-                continue
-
-            if op[0] == "graceedit":
-                assert isinstance(op[1], AnnNote)
-                assert isinstance(op[2], AnnNote)
-                note1 = score1.recurse().getElementById(op[1].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                note2 = score2.recurse().getElementById(op[2].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                newLine = f"@@ {Visualization._location_of(note1, score1)} @@\n"
-                oneOutput = newLine
-                newLine = f"-({note1.classes[0]}:grace) {op[1].readable_str('grace')}\n"
-                oneOutput += newLine
-                newLine = f"+({note2.classes[0]}:grace) {op[2].readable_str('grace')}"
-                oneOutput += newLine
-                outputList.append(oneOutput)
-                continue
-
-            if op[0] == "graceslashedit":
-                assert isinstance(op[1], AnnNote)
-                assert isinstance(op[2], AnnNote)
-                note1 = score1.recurse().getElementById(op[1].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                note2 = score2.recurse().getElementById(op[2].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                newLine = f"@@ {Visualization._location_of(note1, score1)} @@\n"
-                oneOutput = newLine
-                newLine = f"-({note1.classes[0]}:graceslash) {op[1].readable_str('graceslash')}\n"
-                oneOutput += newLine
-                newLine = f"+({note2.classes[0]}:graceslash) {op[2].readable_str('graceslash')}"
-                oneOutput += newLine
-                outputList.append(oneOutput)
-                continue
-
-            # beam
-            if op[0] in ("insbeam", "delbeam", "editbeam"):
-                assert isinstance(op[1], AnnNote)
-                assert isinstance(op[2], AnnNote)
-                note1 = score1.recurse().getElementById(op[1].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                note2 = score2.recurse().getElementById(op[2].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                newLine = f"@@ {Visualization._location_of(note1, score1)} @@\n"
-                oneOutput = newLine
-                newLine = f"-({note1.classes[0]}:flagsbeams) {op[1].readable_str('flagsbeams')}\n"
-                oneOutput += newLine
-                newLine = f"+({note2.classes[0]}:flagsbeams) {op[2].readable_str('flagsbeams')}"
-                oneOutput += newLine
-                outputList.append(oneOutput)
-                continue
-
-            if op[0] == "editnoteshape":
-                assert isinstance(op[1], AnnNote)
-                assert isinstance(op[2], AnnNote)
-                note1 = score1.recurse().getElementById(op[1].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                note2 = score2.recurse().getElementById(op[2].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                newLine = f"@@ {Visualization._location_of(note1, score1)} @@\n"
-                oneOutput = newLine
-                newLine = f"-({note1.classes[0]}:noteshape) {op[1].readable_str('noteshape')}\n"
-                oneOutput += newLine
-                newLine = f"+({note2.classes[0]}:noteshape) {op[2].readable_str('noteshape')}"
-                oneOutput += newLine
-                outputList.append(oneOutput)
-                continue
-
-            if op[0] in ("editspace", "insspace", "delspace"):
-                assert isinstance(op[1], AnnNote)
-                assert isinstance(op[2], AnnNote)
-                note1 = score1.recurse().getElementById(op[1].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                note2 = score2.recurse().getElementById(op[2].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                newLine = f"@@ {Visualization._location_of(note1, score1)} @@\n"
-                oneOutput = newLine
-                newLine = f"-({note1.classes[0]}:spacebefore) {op[1].readable_str('spacebefore')}\n"
-                oneOutput += newLine
-                newLine = f"+({note2.classes[0]}:spacebefore) {op[2].readable_str('spacebefore')}"
-                oneOutput += newLine
-                outputList.append(oneOutput)
-                continue
-
-            if op[0] == "editnoteheadfill":
-                assert isinstance(op[1], AnnNote)
-                assert isinstance(op[2], AnnNote)
-                note1 = score1.recurse().getElementById(op[1].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                note2 = score2.recurse().getElementById(op[2].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                newLine = f"@@ {Visualization._location_of(note1, score1)} @@\n"
-                oneOutput = newLine
-                newLine = f"-({note1.classes[0]}:notefill) {op[1].readable_str('notefill')}\n"
-                oneOutput += newLine
-                newLine = f"+({note2.classes[0]}:notefill) {op[2].readable_str('notefill')}"
-                oneOutput += newLine
-                outputList.append(oneOutput)
-                continue
-
-            if op[0] == "editnoteheadparenthesis":
-                assert isinstance(op[1], AnnNote)
-                assert isinstance(op[2], AnnNote)
-                note1 = score1.recurse().getElementById(op[1].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                note2 = score2.recurse().getElementById(op[2].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                newLine = f"@@ {Visualization._location_of(note1, score1)} @@\n"
-                oneOutput = newLine
-                newLine = f"-({note1.classes[0]}:noteparen) {op[1].readable_str('noteparen')}\n"
-                oneOutput += newLine
-                newLine = f"+({note2.classes[0]}:noteparen) {op[2].readable_str('noteparen')}"
-                oneOutput += newLine
-                outputList.append(oneOutput)
+                chord1, note1, idx = Visualization._chord_and_note(
+                    id_map1, op[1], op[4][0], False
+                )
+                outputList.append(
+                    f"@@ {Visualization._location_of(chord1, score1, locCache)} @@\n"
+                    f"-({note1.classes[0]}:pitch) {op[1].readable_str('pitch', idx=idx)}"
+                )
                 continue
 
-            if op[0] == "editstemdirection":
+            if opName == "editstyle":
                 assert isinstance(op[1], AnnNote)
                 assert isinstance(op[2], AnnNote)
-                note1 = score1.recurse().getElementById(op[1].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                note2 = score2.recurse().getElementById(op[2].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                newLine = f"@@ {Visualization._location_of(note1, score1)} @@\n"
-                oneOutput = newLine
-                newLine = f"-({note1.classes[0]}:stemdir) {op[1].readable_str('stemdir')}\n"
-                oneOutput += newLine
-                newLine = f"+({note2.classes[0]}:stemdir) {op[2].readable_str('stemdir')}"
-                oneOutput += newLine
-                outputList.append(oneOutput)
-                continue
+                changedStr = Visualization._changed_style_keys(
+                    op[1].styledict, op[2].styledict
+                )
 
-            if op[0] == "editstyle":
-                assert isinstance(op[1], AnnNote)
-                assert isinstance(op[2], AnnNote)
-                sd1 = op[1].styledict
-                sd2 = op[2].styledict
-                changedStr = ""
-                for k1, v1 in sd1.items():
-                    if k1 not in sd2 or sd2[k1] != v1:
-                        if changedStr:
-                            changedStr += ","
-                        changedStr += k1
-
-                # one last thing: check for keys in sd2 that aren't in sd1
-                for k2 in sd2:
-                    if k2 not in sd1:
-                        if changedStr:
-                            changedStr += ","
-                        changedStr += k2
-
-                note1 = score1.recurse().getElementById(op[1].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                note2 = score2.recurse().getElementById(op[2].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
+                note1 = id_map1[op[1].general_note]  # type: ignore
+                note2 = id_map2[op[2].general_note]  # type: ignore
                 style1 = op[1].readable_str('style', changedStr=changedStr)
                 style2 = op[2].readable_str('style', changedStr=changedStr)
-                newLine = f"@@ {Visualization._location_of(note1, score1)} @@\n"
-                oneOutput = newLine
-                newLine = f"-({note1.classes[0]}:{changedStr}) {style1}\n"
-                oneOutput += newLine
-                newLine = f"+({note2.classes[0]}:{changedStr}) {style2}"
-                oneOutput += newLine
-                outputList.append(oneOutput)
-                continue
-
-            # accident
-            if op[0] in ("accidentins", "accidentdel", "accidentedit"):
-                assert isinstance(op[1], AnnNote)
-                assert isinstance(op[2], AnnNote)
-                assert len(op) == 5  # the indices must be there
-                chord1 = score1.recurse().getElementById(op[1].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert chord1 is not None
-                note1 = chord1
-                if "Chord" in chord1.classes:
-                    # report only the indexed note's accidental in the chord
-                    idx = op[4][0]
-                    note1 = chord1.notes[idx]
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                chord2 = score2.recurse().getElementById(op[2].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert chord2 is not None
-                note2 = chord2
-                if "Chord" in chord2.classes:
-                    # report only the indexed note's accidental in the chord
-                    idx = op[4][1]
-                    note2 = chord2.notes[idx]
-                else:
-                    idx = 0
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                newLine = f"@@ {Visualization._location_of(chord1, score1)} @@\n"
-                oneOutput = newLine
-                newLine = f"-({note1.classes[0]}:accid) {op[1].readable_str('accid', idx=idx)}\n"
-                oneOutput += newLine
-                newLine = f"+({note2.classes[0]}:accid) {op[2].readable_str('accid', idx=idx)}"
-                oneOutput += newLine
-                outputList.append(oneOutput)
-                continue
-
-            if op[0] in ("dotins", "dotdel"):
-                assert isinstance(op[1], AnnNote)
-                assert isinstance(op[2], AnnNote)
-                note1 = score1.recurse().getElementById(op[1].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                note2 = score2.recurse().getElementById(op[2].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                newLine = f"@@ {Visualization._location_of(note1, score1)} @@\n"
-                oneOutput = newLine
-                newLine = f"-({note1.classes[0]}:dots) {op[1].readable_str('dots')}\n"
-                oneOutput += newLine
-                newLine = f"+({note2.classes[0]}:dots) {op[2].readable_str('dots')}"
-                oneOutput += newLine
-                outputList.append(oneOutput)
-                continue
-
-            # tuplets
-            if op[0] in ("instuplet", "deltuplet", "edittuplet"):
-                assert isinstance(op[1], AnnNote)
-                assert isinstance(op[2], AnnNote)
-                note1 = score1.recurse().getElementById(op[1].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                note2 = score2.recurse().getElementById(op[2].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                newLine = f"@@ {Visualization._location_of(note1, score1)} @@\n"
-                oneOutput = newLine
-                newLine = f"-({note1.classes[0]}:tuplet) {op[1].readable_str('tuplet')}\n"
-                oneOutput += newLine
-                newLine = f"+({note2.classes[0]}:tuplet) {op[2].readable_str('tuplet')}"
-                oneOutput += newLine
-                outputList.append(oneOutput)
-                continue
-
-            # ties
-            if op[0] in ("tieins", "tiedel"):
-                assert isinstance(op[1], AnnNote)
-                assert isinstance(op[2], AnnNote)
-                assert len(op) == 5  # the indices must be there
-                # Color the modified note here in both scores,
-                # using Visualization.INSERTED_COLOR
-                chord1 = score1.recurse().getElementById(op[1].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert chord1 is not None
-                note1 = chord1
-                if "Chord" in chord1.classes:
-                    # report just the indexed note in the chord
-                    idx = op[4][0]
-                    note1 = chord1.notes[idx]
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                chord2 = score2.recurse().getElementById(op[2].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert chord2 is not None
-                note2 = chord2
-                if "Chord" in chord2.classes:
-                    # report just the indexed note in the chord
-                    idx = op[4][1]
-                    note2 = chord2.notes[idx]
-                else:
-                    idx = 0
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                newLine = f"@@ {Visualization._location_of(chord1, score1)} @@\n"
-                oneOutput = newLine
-                newLine = f"-({note1.classes[0]}:tie) {op[1].readable_str('tie', idx=idx)}\n"
-                oneOutput += newLine
-                newLine = f"+({note2.classes[0]}:tie) {op[2].readable_str('tie', idx=idx)}"
-                oneOutput += newLine
-                outputList.append(oneOutput)
-                continue
-
-            # expressions
-            if op[0] in ("insexpression", "delexpression", "editexpression"):
-                assert isinstance(op[1], AnnNote)
-                assert isinstance(op[2], AnnNote)
-                note1 = score1.recurse().getElementById(op[1].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                note2 = score2.recurse().getElementById(op[2].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                newLine = f"@@ {Visualization._location_of(note1, score1)} @@\n"
-                oneOutput = newLine
-                newLine = f"-({note1.classes[0]}:expression) {op[1].readable_str('expression')}\n"
-                oneOutput += newLine
-                newLine = f"+({note2.classes[0]}:expression) {op[2].readable_str('expression')}"
-                oneOutput += newLine
-                outputList.append(oneOutput)
-                continue
-
-            # articulations
-            if op[0] in ("insarticulation", "delarticulation", "editarticulation"):
-                assert isinstance(op[1], AnnNote)
-                assert isinstance(op[2], AnnNote)
-                note1 = score1.recurse().getElementById(op[1].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                note2 = score2.recurse().getElementById(op[2].general_note)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                newLine = f"@@ {Visualization._location_of(note1, score1)} @@\n"
-                oneOutput = newLine
-                newLine = f"-({note1.classes[0]}:artic) {op[1].readable_str('artic')}\n"
-                oneOutput += newLine
-                newLine = f"+({note2.classes[0]}:artic) {op[2].readable_str('artic')}"
-                oneOutput += newLine
-                outputList.append(oneOutput)
+                outputList.append(
+                    f"@@ {Visualization._location_of(note1, score1, locCache)} @@\n"
+                    f"-({note1.classes[0]}:{changedStr}) {style1}\n"
+                    f"+({note2.classes[0]}:{changedStr}) {style2}"
+                )
                 continue
 
             # lyrics
-            if op[0] == "lyricins":
-                assert isinstance(op[2], AnnLyric)
-                note2 = score2.recurse().getElementById(op[2].lyric_holder)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                newLine = f"@@ {Visualization._location_of(note2, score2)} @@\n"
-                oneOutput = newLine
-                newLine = f"+(Lyric) {op[2].readable_str('')}"
-                oneOutput += newLine
-                outputList.append(oneOutput)
-                continue
-
-            if op[0] == "lyricdel":
-                assert isinstance(op[1], AnnLyric)
-                note1 = score1.recurse().getElementById(op[1].lyric_holder)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                newLine = f"@@ {Visualization._location_of(note1, score1)} @@\n"
-                oneOutput = newLine
-                newLine = f"-(Lyric) {op[1].readable_str('')}"
-                oneOutput += newLine
-                outputList.append(oneOutput)
-                continue
-
-            if op[0] == "lyricsub":
-                assert isinstance(op[1], AnnLyric)
-                assert isinstance(op[2], AnnLyric)
-                note1 = score1.recurse().getElementById(op[1].lyric_holder)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                note2 = score2.recurse().getElementById(op[2].lyric_holder)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                newLine = f"@@ {Visualization._location_of(note1, score1)} @@\n"
-                oneOutput = newLine
-                newLine = f"-(Lyric) {op[1].readable_str('')}"
-                oneOutput += newLine
-                if op[1].offset != op[2].offset:
-                    outputList.append(oneOutput)
-                    newLine = f"@@ {Visualization._location_of(note2, score2)} @@\n"
-                    oneOutput = newLine
-                else:
-                    oneOutput += "\n"
-                newLine = f"+(Lyric) {op[2].readable_str('')}"
-                oneOutput += newLine
-                outputList.append(oneOutput)
-                continue
-
-            if op[0] == "lyricedit":
-                assert isinstance(op[1], AnnLyric)
-                assert isinstance(op[2], AnnLyric)
-                note1 = score1.recurse().getElementById(op[1].lyric_holder)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                note2 = score2.recurse().getElementById(op[2].lyric_holder)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                newLine = f"@@ {Visualization._location_of(note1, score1)} @@\n"
-                oneOutput = newLine
-                newLine = f"-(Lyric:rawtext) {op[1].readable_str('rawtext')}"
-                oneOutput += newLine
-                if op[1].offset != op[2].offset:
-                    outputList.append(oneOutput)
-                    newLine = f"@@ {Visualization._location_of(note2, score2)} @@\n"
-                    oneOutput = newLine
-                else:
-                    oneOutput += "\n"
-                newLine = f"+(Lyric:rawtext) {op[2].readable_str('rawtext')}"
-                oneOutput += newLine
-                outputList.append(oneOutput)
-                continue
-
-            if op[0] == "lyricnumedit":
-                assert isinstance(op[1], AnnLyric)
-                assert isinstance(op[2], AnnLyric)
-                note1 = score1.recurse().getElementById(op[1].lyric_holder)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                note2 = score2.recurse().getElementById(op[2].lyric_holder)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                newLine = f"@@ {Visualization._location_of(note1, score1)} @@\n"
-                oneOutput = newLine
-                newLine = f"-(Lyric:number) {op[1].readable_str('number')}"
-                oneOutput += newLine
-                if op[1].offset != op[2].offset:
-                    outputList.append(oneOutput)
-                    newLine = f"@@ {Visualization._location_of(note2, score2)} @@\n"
-                    oneOutput = newLine
-                else:
-                    oneOutput += "\n"
-                newLine = f"+(Lyric:number) {op[2].readable_str('number')}"
-                oneOutput += newLine
-                outputList.append(oneOutput)
-                continue
-
-            if op[0] == "lyricidedit":
-                assert isinstance(op[1], AnnLyric)
+            if opName == "lyricins":
                 assert isinstance(op[2], AnnLyric)
-                note1 = score1.recurse().getElementById(op[1].lyric_holder)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                note2 = score2.recurse().getElementById(op[2].lyric_holder)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                newLine = f"@@ {Visualization._location_of(note1, score1)} @@\n"
-                oneOutput = newLine
-                newLine = f"-(Lyric:id) {op[1].readable_str('id')}"
-                oneOutput += newLine
-                if op[1].offset != op[2].offset:
-                    outputList.append(oneOutput)
-                    newLine = f"@@ {Visualization._location_of(note2, score2)} @@\n"
-                    oneOutput = newLine
-                else:
-                    oneOutput += "\n"
-                newLine = f"+(Lyric:id) {op[2].readable_str('id')}"
-                oneOutput += newLine
-                outputList.append(oneOutput)
+                note2 = id_map2[op[2].lyric_holder]  # type: ignore
+                outputList.append(
+                    f"@@ {Visualization._location_of(note2, score2, locCache)} @@\n"
+                    f"+(Lyric) {op[2].readable_str('')}"
+                )
                 continue
 
-            if op[0] == "lyricoffsetedit":
+            if opName == "lyricdel":
                 assert isinstance(op[1], AnnLyric)
-                assert isinstance(op[2], AnnLyric)
-                note1 = score1.recurse().getElementById(op[1].lyric_holder)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                note2 = score2.recurse().getElementById(op[2].lyric_holder)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                newLine = f"@@ {Visualization._location_of(note1, score1)} @@\n"
-                oneOutput = newLine
-                newLine = f"-(Lyric:offset) {op[1].readable_str('offset')}\n"
-                oneOutput += newLine
-                newLine = f"@@ {Visualization._location_of(note2, score2)} @@\n"
-                oneOutput += newLine
-                newLine = f"+(Lyric:offset) {op[2].readable_str('offset')}"
-                oneOutput += newLine
-                outputList.append(oneOutput)
+                note1 = id_map1[op[1].lyric_holder]  # type: ignore
+                outputList.append(
+                    f"@@ {Visualization._location_of(note1, score1, locCache)} @@\n"
+                    f"-(Lyric) {op[1].readable_str('')}"
+                )
                 continue
 
-            if op[0] == "lyricstyleedit":
+            if opName == "lyricoffsetedit":
                 assert isinstance(op[1], AnnLyric)
                 assert isinstance(op[2], AnnLyric)
-                note1 = score1.recurse().getElementById(op[1].lyric_holder)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note1 is not None
-                note2 = score2.recurse().getElementById(op[2].lyric_holder)  # type: ignore
-                if t.TYPE_CHECKING:
-                    assert note2 is not None
-                newLine = f"@@ {Visualization._location_of(note1, score1)} @@\n"
-                oneOutput = newLine
-                newLine = f"-(Lyric:style) {op[1].readable_str('style')}"
-                oneOutput += newLine
-                if op[1].offset != op[2].offset:
-                    outputList.append(oneOutput)
-                    newLine = f"@@ {Visualization._location_of(note2, score2)} @@\n"
-                    oneOutput = newLine
-                else:
-                    oneOutput += "\n"
-                newLine = f"+(Lyric:style) {op[2].readable_str('style')}"
-                oneOutput += newLine
-                outputList.append(oneOutput)
+                note1 = id_map1[op[1].lyric_holder]  # type: ignore
+                note2 = id_map2[op[2].lyric_holder]  # type: ignore
+                outputList.append(
+                    f"@@ {Visualization._location_of(note1, score1, locCache)} @@\n"
+                    f"-(Lyric:offset) {op[1].readable_str('offset')}\n"
+                    f"@@ {Visualization._location_of(note2, score2, locCache)} @@\n"
+                    f"+(Lyric:offset) {op[2].readable_str('offset')}"
+                )
                 continue
 
             # metadata
-            if op[0] == "mditemins":
-                assert isinstance(op[2], AnnMetadataItem)
-                newLine = f"@@ {Visualization._location_of(score1.metadata, score1)} @@\n"
-                oneOutput = newLine
-                newLine = f"+(metadata) {op[1].readable_str()}"
-                oneOutput += newLine
-                outputList.append(oneOutput)
-                continue
-
-            if op[0] == "mditemdel":
-                assert isinstance(op[1], AnnMetadataItem)
-                newLine = f"@@ {Visualization._location_of(score1.metadata, score1)} @@\n"
-                oneOutput = newLine
-                newLine = f"-(metadata) {op[1].readable_str()}"
-                oneOutput += newLine
-                outputList.append(oneOutput)
-                continue
-
-            if op[0] == "mditemsub":
-                assert isinstance(op[1], AnnMetadataItem)
-                assert isinstance(op[2], AnnMetadataItem)
-                newLine = f"@@ {Visualization._location_of(score1.metadata, score1)} @@\n"
-                oneOutput = newLine
-                newLine = f"-(metadata) {op[1].readable_str()}\n"
-                oneOutput += newLine
-                newLine = f"+(metadata) {op[2].readable_str()}"
-                oneOutput += newLine
-                outputList.append(oneOutput)
-                continue
-
-            if op[0] == "mditemkeyedit":
-                assert isinstance(op[1], AnnMetadataItem)
+            if opName == "mditemins":
                 assert isinstance(op[2], AnnMetadataItem)
-                newLine = f"@@ {Visualization._location_of(score1.metadata, score1)} @@\n"
-                oneOutput = newLine
-                newLine = f"-(metadata:key) {op[1].readable_str()}\n"
-                oneOutput += newLine
-                newLine = f"+(metadata:key) {op[2].readable_str()}"
-                oneOutput += newLine
-                outputList.append(oneOutput)
+                outputList.append(
+                    f"@@ {Visualization._location_of(score1.metadata, score1, locCache)} @@\n"
+                    f"+(metadata) {op[2].readable_str()}"
+                )
                 continue
 
-            if op[0] == "mditemvalueedit":
+            if opName == "mditemdel":
                 assert isinstance(op[1], AnnMetadataItem)
-                assert isinstance(op[2], AnnMetadataItem)
-                newLine = f"@@ {Visualization._location_of(score1.metadata, score1)} @@\n"
-                oneOutput = newLine
-                newLine = f"-(metadata:value) {op[1].readable_str()}\n"
-                oneOutput += newLine
-                newLine = f"+(metadata:value) {op[2].readable_str()}"
-                oneOutput += newLine
-                outputList.append(oneOutput)
+                outputList.append(
+                    f"@@ {Visualization._location_of(score1.metadata, score1, locCache)} @@\n"
+                    f"-(metadata) {op[1].readable_str()}"
+                )
                 continue
 
             print(
-                f"Annotation type {op[0]} not yet supported for visualization",
+                f"Annotation type {opName} not yet supported for visualization",
                 file=sys.stderr
             )
 
@@ -2820,68 +1690,8 @@ class Visualization:
         # number, and then beat (as parsed from "@@ measure 3b, staff 2, beat 1.5 @@")
         # The goal is for all measure 0's to be printed first (with measure 0's staff 0
         # first), with the contents of each staff of each measure coming out in beat order.
-        LOC_PATTERN: str = (
-            r"\@\@ measure (\d+)(\w*), staff (\d+), beat (\d+|\d+[./]\d+|\d+ \d+/\d+) \@\@"
-        )
-        def measNum(s: str) -> int:
-            m = re.match(LOC_PATTERN, s)
-            if not m:
-                return -1
-            measNumStr: str = m.group(1)
-            measNum: int = -1
-            try:
-                measNum = int(measNumStr)
-            except Exception:
-                pass
-            return measNum
-
-        def measSuf(s: str) -> str:
-            m = re.match(LOC_PATTERN, s)
-            if not m:
-                return ''
-            measSuf: str = m.group(2)
-            return measSuf
-
-        def staffNum(s: str) -> int:
-            m = re.match(LOC_PATTERN, s)
-            if not m:
-                return -1
-            staffNumStr: str = m.group(3)
-            staffNum: int = -1
-            try:
-                staffNum = int(staffNumStr)
-            except Exception:
-                pass
-            return staffNum
-
-        def beat(s: str) -> OffsetQL:
-            # can be of the form "j n/m" (mixed), "n/m" (Fraction), or "n.m" (float)
-            m = re.match(LOC_PATTERN, s)
-            if not m:
-                return 0.
-            beatStr: str = m.group(4)
-            beats: OffsetQL = 0.
-            beatsFrac: Fraction = Fraction(0, 1)
-            beatsFloat: float = 0.
-            try:
-                if " " in beatStr and "/" in beatStr:
-                    # mixed fraction "j n/m"
-                    nums: list[str] = beatStr.split(' ')
-                    wholeNum: int = int(nums[0])
-                    frac: Fraction = Fraction(nums[1])
-                    beats = opFrac(wholeNum + frac)
-                elif "/" in beatStr:
-                    # fraction
-                    beatsFrac = Fraction(beatStr)
-                    beats = opFrac(beatsFrac)
-                else:
-                    beatsFloat = float(beatStr)
-                    beats = opFrac(beatsFloat)
-            except Exception:
-                pass
-            return beats
-
-        outputList.sort(key=lambda s: (measNum(s), measSuf(s), staffNum(s), beat(s)))
+        if len(outputList) > 1:
+            outputList.sort(key=Visualization._location_sort_key)
 
         if operations:
             # filenames only show up at the start of text output if there are any diffs
@@ -61,7 +61,6 @@ if __name__ == '__main__':
 
         install_requires=[
             'music21>=9.1',
-            'numpy',
             'converter21>=3.2'
         ],
 
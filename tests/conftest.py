@@ -0,0 +1,6 @@
+import converter21
+
+# Register converter21's subconverters (MEI, Humdrum, etc) once for the whole test run.
+# music21 doesn't dedupe registered subconverters, so registering again in each test
+# class just made every m21.converter.parse search a longer list.
+converter21.register()
@@ -1,12 +1,9 @@
 from pathlib import Path
 import music21 as m21
-import converter21
 from musicdiff.annotation import AnnScore, AnnNote
 from musicdiff import DetailLevel
 
 class TestNl:
-    converter21.register()
-
     def test_annotNote1(self):
         n1 = m21.note.Note(nameWithOctave="D#5", quarterLength=1)
         n1.id = 344
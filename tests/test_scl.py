@@ -1,15 +1,12 @@
 from pathlib import Path
 
 import music21 as m21
-import converter21
 
 from musicdiff import Comparison
 from musicdiff.annotation import AnnScore, AnnNote
 from musicdiff import DetailLevel
 
 class TestScl:
-    converter21.register()
-
     def test_non_common_subsequences_myers1(self):
         original = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
         compare_to = [0, 0, 2, 3, 4, 5, 6, 4, 5, 9, 10]
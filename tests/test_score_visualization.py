@@ -1,15 +1,13 @@
 from pathlib import Path
 
 import music21 as m21
-import converter21
 
 from musicdiff.annotation import AnnScore
 from musicdiff import Comparison
 from musicdiff import Visualization
+from musicdiff import DetailLevel
 
 class TestScoreVisualization:
-    converter21.register()
-
     def test_scorevis1(self):
         score1_path = Path("tests/test_scores/tie_score_2a.mei")
         score1 = m21.converter.parse(str(score1_path))
@@ -51,3 +49,20 @@ class TestScoreVisualization:
         Visualization.mark_diffs(score1, score2, op_list)
         # Visualization.show_diffs(score1, score2)
 
+
+
+    def test_scorevis4(self):
+        # an inserted metadata item only exists in score2 (op[1] is None)
+        score1_path = Path("tests/test_scores/monophonic_score_1a.mei")
+        score1 = m21.converter.parse(str(score1_path))
+        score2 = m21.converter.parse(str(score1_path))
+        score2.metadata.copyright = "2024 Someone"
+        detail = DetailLevel.AllObjects | DetailLevel.Metadata
+        # build ScoreTrees
+        score_lin1 = AnnScore(score1, detail)
+        score_lin2 = AnnScore(score2, detail)
+        # compute the complete score diff
+        op_list, _ = Comparison.annotated_scores_diff(score_lin1, score_lin2)
+        assert [op[0] for op in op_list] == ["mditemins"]
+        output = Visualization.get_text_output(score1, score2, op_list)
+        assert "+(metadata) copyright:2024 Someone" in output